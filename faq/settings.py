@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'faqApp.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -189,24 +191,99 @@ CACHES = {
         "LOCATION": "redis://redis:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "COMPRESSOR": "faqApp.compression.CacheCompressor",
+            # Calls fail fast while Redis is sick; see FAQ_REDIS_CIRCUIT_BREAKER
+            "REDIS_CLIENT_CLASS": "faqApp.circuit.BreakerRedis",
+            "ASYNC_REDIS_CLIENT_CLASS": "faqApp.circuit.AsyncBreakerRedis",
+            "IGNORE_EXCEPTIONS": True,
             "CONNECTION_POOL_CLASS": "redis.BlockingConnectionPool",
-            "CONNECTION_POOL_CLASS_KWARGS": {
+            "CONNECTION_POOL_KWARGS": {
                 "max_connections": 50,
-                "timeout": 20,
+                "timeout": 0.5,
             },
-            "RETRY_ON_TIMEOUT": True,
-            "SOCKET_CONNECT_TIMEOUT": 5,
-            "SOCKET_TIMEOUT": 5,
+            "SOCKET_CONNECT_TIMEOUT": 0.25,
+            "SOCKET_TIMEOUT": 0.5,
         }
     }
 }
 
+# After FAILURE_THRESHOLD consecutive Redis connection errors or timeouts, skip
+# Redis for RESET_TIMEOUT seconds and serve from the local cache tier alone.
+FAQ_REDIS_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT': 5,
+}
+
+# Redis connections report their command timings to faqApp.metrics
+DJANGO_REDIS_CONNECTION_FACTORY = 'faqApp.metrics.InstrumentedConnectionFactory'
+
+# Send per-request db/redis/translator timings in a Server-Timing header
+FAQ_SERVER_TIMING = DEBUG
+
+# /metrics is served to staff users and to requests sending this token as
+# "Authorization: Bearer <token>"; None leaves it to staff only.
+FAQ_METRICS_TOKEN = None
+
+# Days the change feed log is kept; prune it with `manage.py prune_faq_changes`.
+# Clients whose `since` token is older get `resync` and start over.
+FAQ_CHANGE_RETENTION_DAYS = 30
+
 # Cache time to live is 15 minutes.
 CACHE_TTL = 60 * 15
 
 # Cache key prefix
 CACHE_KEY_PREFIX = "faq_"
 
+# In-process tier in front of Redis for FAQ responses. Workers evict each other's
+# entries over Redis pub/sub; TIMEOUT bounds staleness if a message is lost.
+# Set MAX_ENTRIES to 0 to disable it.
+FAQ_LOCAL_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 30,
+    'INVALIDATION_BUS': 'faqApp.cache.RedisInvalidationBus',
+}
+
+# A list/detail cache miss is rebuilt by one worker holding a Redis lease of
+# LEASE seconds; concurrent requests for the same key wait up to WAIT seconds
+# for its result before building it themselves.
+FAQ_RECOMPUTE_LOCK = {
+    'LEASE': 10,
+    'WAIT': 2,
+}
+
+# Stale-while-revalidate: list/detail entries are fresh for this many seconds
+# and kept until CACHE_TTL. In between they are still served at once, while one
+# worker rebuilds them in the background. None rebuilds only after CACHE_TTL.
+FAQ_CACHE_SOFT_TTL = 60 * 10
+
+# Cached values of at least this many bytes are stored compressed, with lz4 when
+# installed and zlib otherwise: responses through the COMPRESSOR above, the raw
+# translation keys directly.
+FAQ_CACHE_COMPRESS_MIN_LENGTH = 1024
+
+# Cache list/detail responses as rendered JSON bytes (plus a gzip variant) so
+# cache hits skip the serializer and renderer.
+FAQ_CACHE_RENDERED_RESPONSES = False
+FAQ_CACHE_COMPRESSED_RESPONSES = True
+
+# Translation backend. Use faqApp.translation.StubTranslator to run offline.
+FAQ_TRANSLATOR = {
+    'BACKEND': 'faqApp.translation.GoogleTranslator',
+    'OPTIONS': {},
+}
+
+# Seconds the async read endpoints (under ASGI) wait for missing translations
+# before serving English and queuing them like the blocking views do.
+FAQ_ASYNC_TRANSLATION_TIMEOUT = 5
+
+# Queue for translations missing at read time. The local queue runs in-process;
+# use faqApp.tasks.RedisTranslationQueue with `manage.py translation_worker`
+# to work them off in a separate process.
+FAQ_TRANSLATION_QUEUE = {
+    'BACKEND': 'faqApp.tasks.LocalTranslationQueue',
+    'OPTIONS': {},
+}
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
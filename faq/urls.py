@@ -19,12 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.authtoken.views import obtain_auth_token
+from faqApp.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('faqApp.urls')),
     path("ckeditor5/", include('django_ckeditor_5.urls')),
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Add these lines to serve media files during development
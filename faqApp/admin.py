@@ -1,23 +1,47 @@
 from django.contrib import admin
-from .models import FAQ
+from .models import FAQ, FAQChange, FAQTranslation, SearchPosting
+from .cache import bump_generation, invalidate
+
+
+class FAQTranslationInline(admin.TabularInline):
+    model = FAQTranslation
+    fields = ('lang', 'field', 'text')
+    extra = 0
+
 
 @admin.register(FAQ)
 class FAQAdmin(admin.ModelAdmin):
     list_display = ('question', 'created_at', 'updated_at', 'is_active')
     list_filter = ('is_active', 'created_at', 'updated_at')
-    search_fields = ('question', 'answer', 'translations')
-    readonly_fields = ('created_at', 'updated_at', 'translations')
+    search_fields = ('question', 'answer', 'translations__text')
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [FAQTranslationInline]
     
     fieldsets = (
         ('Content', {
             'fields': ('question', 'answer', 'is_active')
         }),
-        ('Translations', {
-            'fields': ('translations',),
-            'classes': ('collapse',)
-        }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
+
+    def save_related(self, request, form, formsets, change):
+        # Runs after the FAQ and its translation rows are saved
+        super().save_related(request, form, formsets, change)
+        invalidate(form.instance.id, list_changed=not change or 'is_active' in form.changed_data)
+
+    def delete_model(self, request, obj):
+        faq_id = obj.id
+        super().delete_model(request, obj)
+        invalidate(faq_id)
+
+    def delete_queryset(self, request, queryset):
+        faq_ids = list(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
+        SearchPosting.forget_document_count()
+        FAQChange.record(faq_ids, deleted=True)
+        for faq_id in faq_ids:
+            invalidate(faq_id, list_changed=False)
+        bump_generation('list')
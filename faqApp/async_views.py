@@ -0,0 +1,214 @@
+"""Async read endpoints for ASGI deployments.
+
+They mirror FAQViewSet's list, retrieve and translations actions and share
+their cache entries, but wait on Redis, the database and the translator
+without holding a thread, so one worker can serve many concurrent misses.
+Unlike the blocking views, missing translations are translated within the
+request, up to FAQ_ASYNC_TRANSLATION_TIMEOUT seconds, and only queued after.
+Misses are coalesced and stale entries refreshed as in the blocking views.
+"""
+import asyncio
+import json
+import logging
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from .cache import (aget_generation, atrack_dependencies, get_async_redis, get_response_cache,
+                    log_redis_error, revalidate)
+from .circuit import REDIS_ERRORS
+from .compression import compress, decompress
+from .locks import asingle_flight
+from .models import FAQ
+from .pagination import FAQPagination
+from .responses import CachedResponse, make_etag, not_modified, set_validators
+from .serializers import FAQSerializer
+from .views import DEFAULT_RECOMPUTE_LOCK, FAQViewSet, requested_languages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSLATION_TIMEOUT = 5
+
+
+def not_found(detail):
+    return JsonResponse({'detail': detail}, status=404)
+
+
+async def serialize(faqs, lang):
+    """Serialize like FAQViewSet, translating what is missing concurrently first."""
+    prefetched = await FAQ.aprefetch_cached_translations(faqs, lang)
+    timeout = getattr(settings, 'FAQ_ASYNC_TRANSLATION_TIMEOUT', DEFAULT_TRANSLATION_TIMEOUT)
+    try:
+        prefetched.update(await asyncio.wait_for(
+            FAQ.atranslate_missing(faqs, lang, prefetched), timeout))
+    except Exception as e:
+        # The serializer queues whatever is still missing
+        logger.warning("Async translation to %s failed: %s", lang, e)
+    serializer = FAQSerializer(faqs, many=True, context={
+        'language': lang,
+        'prefetched_translations': prefetched,
+    })
+    # Off the event loop, as queueing what is still missing talks to Redis
+    return await sync_to_async(lambda: serializer.data)()
+
+
+async def serialize_bundle(faqs, langs):
+    """serialize() in each of `langs` concurrently, shaped like FAQViewSet.serialize_bundle."""
+    results = await asyncio.gather(*[serialize(faqs, lang) for lang in langs])
+    return results[0] if len(langs) == 1 else dict(zip(langs, results))
+
+
+async def cached_or_build(request, cache_key, build):
+    """Answer from the response cache, or from `await build()` -> (data, faqs, generation).
+
+    Like FAQViewSet.cached_or_build: concurrent misses of one key build it
+    once, pending results are handed to the waiters only, and entries past
+    FAQ_CACHE_SOFT_TTL are served while a background thread rebuilds them.
+    """
+    response_cache = get_response_cache()
+    lock = getattr(settings, 'FAQ_RECOMPUTE_LOCK', DEFAULT_RECOMPUTE_LOCK)
+    partial_key = f'{cache_key}_partial'
+    viewset = FAQViewSet()
+    built = []
+
+    async def compute():
+        data, faqs, generation = await build()
+        built.append(data)
+        if not cache_key:
+            return None
+        # Responses still serving English fallbacks must not outlive the translation
+        if not viewset.is_complete(data):
+            await response_cache.aset(partial_key, data, timeout=lock['WAIT'])
+            return data
+        payload = viewset.cache_payload(data, faqs, generation)
+        await response_cache.aset(cache_key, payload, timeout=settings.CACHE_TTL)
+        await atrack_dependencies(cache_key, [faq.id for faq in faqs])
+        return payload
+
+    async def fetch():
+        return await response_cache.aget(cache_key)
+
+    async def wait_fetch():
+        return await response_cache.aget(cache_key) or await response_cache.aget(partial_key)
+
+    payload = None
+    if cache_key:
+        try:
+            payload = await asingle_flight(get_async_redis(), cache_key, fetch=fetch,
+                                           wait_fetch=wait_fetch, compute=compute,
+                                           lease=lock['LEASE'], wait=lock['WAIT'])
+        except REDIS_ERRORS as e:
+            log_redis_error("Taking the recompute lock", e)
+    if payload is None and not built:
+        payload = await compute()
+    if payload is None:
+        payload = built[-1]
+    if not isinstance(payload, CachedResponse):
+        return HttpResponse(JSONRenderer().render(payload), content_type='application/json')
+    if not built and payload.is_stale():
+        revalidate(cache_key, async_to_sync(compute), lease=lock['LEASE'])
+    return payload.to_http_response(request)
+
+
+@require_GET
+async def faq_list(request):
+    try:
+        langs = requested_languages(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    paginator = FAQPagination()
+    drf_request = Request(request)
+    page_token = paginator.get_cache_token(drf_request)
+    if page_token is None:
+        return not_found(paginator.invalid_cursor_message)
+    generation = await aget_generation('list')
+    cache_key = FAQViewSet().get_cache_key('list', lang=','.join(langs), page=page_token,
+                                           generation=generation)
+
+    async def build():
+        queryset = FAQ.objects.filter(is_active=True)
+        if langs != ['en']:
+            queryset = FAQ.with_translations(queryset, langs)
+        # The keyset query is one indexed range scan; the async ORM would run it
+        # in a thread all the same
+        faqs = await sync_to_async(
+            lambda: list(paginator.paginate_queryset(queryset, drf_request)))()
+        # Links point at the blocking endpoint, so both paths cache the same data
+        query = request.META.get('QUERY_STRING')
+        paginator.base_url = request.build_absolute_uri(
+            reverse('faq-list') + (f'?{query}' if query else ''))
+        data = {
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': await serialize_bundle(faqs, langs),
+        }
+        return data, faqs, generation
+
+    return await cached_or_build(request, cache_key, build)
+
+
+@require_GET
+async def faq_detail(request, pk):
+    try:
+        langs = requested_languages(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    generation = await aget_generation('detail')
+    cache_key = FAQViewSet().get_cache_key('detail', pk=pk, lang=','.join(langs),
+                                           generation=generation)
+
+    async def build():
+        queryset = FAQ.objects.filter(pk=pk)
+        if langs != ['en']:
+            queryset = FAQ.with_translations(queryset, langs)
+        faq = await queryset.afirst()
+        if faq is None:
+            raise FAQ.DoesNotExist
+        results = await asyncio.gather(*[serialize([faq], lang) for lang in langs])
+        data = {lang: result[0] for lang, result in zip(langs, results)}
+        return data[langs[0]] if len(langs) == 1 else data, [faq], generation
+
+    try:
+        return await cached_or_build(request, cache_key, build)
+    except FAQ.DoesNotExist:
+        return not_found("No FAQ matches the given query.")
+
+
+@require_GET
+async def faq_translations(request, pk):
+    redis_client = get_async_redis()
+    cache_key = f'faq_translations_{pk}'
+    try:
+        payload = decompress(await redis_client.get(cache_key))
+    except REDIS_ERRORS as e:
+        log_redis_error("Reading cached translations", e)
+        payload = None
+    if payload is None:
+        faq = await FAQ.objects.filter(pk=pk).afirst()
+        if faq is None:
+            return not_found("No FAQ matches the given query.")
+        translations = {'en': {'question': faq.question, 'answer': faq.answer}}
+        async for translation in faq.translations.order_by('lang', 'field'):
+            translations.setdefault(translation.lang, {})[translation.field] = translation.text
+        payload = json.dumps({
+            'last_modified': faq.updated_at.timestamp(),
+            'data': {'id': faq.id, 'translations': translations},
+        }).encode()
+        try:
+            await redis_client.set(cache_key, compress(payload), ex=3600)
+        except REDIS_ERRORS as e:
+            log_redis_error("Caching translations", e)
+        else:
+            await atrack_dependencies(cache_key, [faq.id], raw=True)
+
+    cached = json.loads(payload)
+    etag, last_modified = make_etag(payload), int(cached['last_modified'])
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = HttpResponse(JSONRenderer().render(cached['data']),
+                                content_type='application/json')
+    return set_validators(response, etag, last_modified)
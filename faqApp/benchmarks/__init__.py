@@ -0,0 +1,4 @@
+"""Benchmarks for the FAQ API hot paths, run with `manage.py benchmark <name>`.
+
+Each module in this package exposes `add_arguments(parser)` and `run(options, stdout)`.
+"""
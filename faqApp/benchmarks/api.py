@@ -0,0 +1,117 @@
+"""Latency and throughput of cold and warm list, retrieve and translations requests,
+across corpus sizes and language counts."""
+import random
+import time
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp.cache import get_response_cache
+from faqApp.models import FAQ, FAQTranslation, TranslationMemory
+from faqApp.tasks import get_translation_queue
+from .support import benchmark_environment, latency_stats, seed_faqs
+
+
+def add_arguments(parser):
+    parser.add_argument('--sizes', default='100,1000,10000,100000',
+                        help="Comma-separated corpus sizes, seeded in increasing order")
+    parser.add_argument('--langs', default='hi,bn,fr',
+                        help="Languages with stored translations")
+    parser.add_argument('--lang-counts', default='1,3',
+                        help="Comma-separated numbers of languages the requests spread over")
+    parser.add_argument('--requests', type=int, default=200, help="Requests timed per case")
+    parser.add_argument('--page-size', type=int, default=20, help="FAQs per list page")
+    parser.add_argument('--translator-latency', type=float, default=0.05,
+                        help="Seconds the fake translator takes per batch")
+    parser.add_argument('--untranslated-lang', default='ja',
+                        help="Language without stored translations, translated on request")
+
+
+def clear_caches():
+    cache.clear()
+    get_response_cache().clear()
+
+
+def measure(get, urls, requests, warm):
+    """Time `requests` GETs cycling through `urls`, with or without caches filled."""
+    if warm:
+        for url in urls:
+            get(url)
+    latencies = []
+    for i in range(requests):
+        url = urls[i % len(urls)]
+        if not warm:
+            clear_caches()
+        started = time.perf_counter()
+        response = get(url)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise CommandError(f"{url} answered {response.status_code}")
+    return latency_stats(latencies)
+
+
+def run(options, stdout):
+    sizes = sorted(int(size) for size in options['sizes'].split(','))
+    langs = options['langs'].split(',')
+    lang_counts = [int(count) for count in options['lang_counts'].split(',')]
+    requests, page_size = options['requests'], options['page_size']
+    rng = random.Random(0)
+    results = {}
+    overrides = {
+        'FAQ_TRANSLATOR': {'BACKEND': 'faqApp.translation.StubTranslator',
+                           'OPTIONS': {'latency': options['translator_latency']}},
+        # Reads queue missing translations; nothing works them off mid-run
+        'FAQ_TRANSLATION_QUEUE': {'BACKEND': 'faqApp.tasks.LocalTranslationQueue',
+                                  'OPTIONS': {'start_worker': False}},
+    }
+    with benchmark_environment(options['redis_url'], fake_redis=options['fake_redis']), \
+            override_settings(**overrides):
+        client = APIClient()
+        get = client.get
+        aget = async_to_sync(AsyncClient().get)
+        seeded = 0
+        stdout.write(f"{'faqs':>7} {'langs':>5} {'endpoint':<28} {'state':<5} "
+                     f"{'mean ms':>9} {'p95 ms':>9} {'req/s':>9}")
+        for size in sizes:
+            started = time.perf_counter()
+            seed_faqs(size - seeded, langs=langs, first=seeded)
+            seeded = size
+            stdout.write(f"Seeded {size} FAQs in {time.perf_counter() - started:.1f}s")
+            ids = list(FAQ.objects.values_list('id', flat=True))
+            sample = rng.sample(ids, min(requests, len(ids)))
+
+            for count in lang_counts:
+                active = langs[:count]
+                cases = {
+                    'list': [f"{reverse('faq-list')}?lang={lang}&page_size={page_size}"
+                             for lang in active],
+                    'retrieve': [f"{reverse('faq-detail', args=[faq_id])}?lang={active[i % count]}"
+                                 for i, faq_id in enumerate(sample)],
+                    'translations': [reverse('faq-translations', args=[faq_id])
+                                     for faq_id in sample],
+                }
+                case_results = results.setdefault(str(size), {})[str(count)] = {}
+                for endpoint, urls in cases.items():
+                    for state in ('cold', 'warm'):
+                        stats = measure(get, urls, requests, warm=state == 'warm')
+                        case_results.setdefault(endpoint, {})[state] = stats
+                        stdout.write(f"{size:>7} {count:>5} {endpoint:<28} {state:<5} "
+                                     f"{stats['mean_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                                     f"{stats['requests_per_second']:>9.1f}")
+                get_translation_queue().clear()
+
+            # Translated within the request through the fake translator, once per FAQ
+            untranslated = options['untranslated_lang']
+            FAQTranslation.objects.filter(lang=untranslated).delete()
+            TranslationMemory.objects.filter(lang=untranslated).delete()
+            urls = [f"{reverse('faq-async-detail', args=[faq_id])}?lang={untranslated}"
+                    for faq_id in sample]
+            stats = measure(aget, urls, len(urls), warm=False)
+            results[str(size)]['untranslated'] = {'retrieve_async': {'cold': stats}}
+            stdout.write(f"{size:>7} {'-':>5} {'retrieve_async untranslated':<28} {'cold':<5} "
+                         f"{stats['mean_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+                         f"{stats['requests_per_second']:>9.1f}")
+    return results
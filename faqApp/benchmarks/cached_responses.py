@@ -0,0 +1,49 @@
+"""Requests/sec for cached list hits, with and without pre-rendered response bytes."""
+import time
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp.cache import get_response_cache
+from .support import benchmark_environment, seed_faqs
+
+MODES = {
+    'serializer data': {'FAQ_CACHE_RENDERED_RESPONSES': False},
+    'rendered bytes': {'FAQ_CACHE_RENDERED_RESPONSES': True,
+                       'FAQ_CACHE_COMPRESSED_RESPONSES': False},
+    'rendered + gzip': {'FAQ_CACHE_RENDERED_RESPONSES': True,
+                        'FAQ_CACHE_COMPRESSED_RESPONSES': True},
+}
+
+
+def add_arguments(parser):
+    parser.add_argument('--faqs', type=int, default=100, help="Number of FAQs to seed")
+    parser.add_argument('--lang', default='hi', help="Language requested from the list")
+    parser.add_argument('--page-size', type=int, default=100, help="FAQs per list page")
+    parser.add_argument('--requests', type=int, default=500, help="Cached hits to time per mode")
+
+
+def run(options, stdout):
+    results = {}
+    with benchmark_environment(options['redis_url'], fake_redis=options['fake_redis']):
+        seed_faqs(options['faqs'], langs=[options['lang']])
+        client = APIClient()
+        url = f"{reverse('faq-list')}?lang={options['lang']}&page_size={options['page_size']}"
+
+        for name, overrides in MODES.items():
+            with override_settings(**overrides):
+                cache.clear()
+                get_response_cache().clear()
+                client.get(url, HTTP_ACCEPT_ENCODING='gzip')  # fill the cache
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                elapsed = time.perf_counter() - started
+
+            results[name] = {
+                'requests_per_second': round(options['requests'] / elapsed, 1),
+                'body_bytes': len(response.content),
+            }
+            stdout.write(f"{name:<16} {results[name]['requests_per_second']:>9.1f} req/s "
+                         f"{results[name]['body_bytes']:>8} body bytes")
+    return results
@@ -0,0 +1,36 @@
+"""Query time of list pages at increasing depth, keyset (cursor) against OFFSET."""
+import time
+from faqApp.models import FAQ
+from .support import benchmark_environment, seed_faqs
+
+
+def add_arguments(parser):
+    parser.add_argument('--faqs', type=int, default=100000, help="Number of FAQs to seed")
+    parser.add_argument('--page-size', type=int, default=100, help="FAQs per list page")
+    parser.add_argument('--repeat', type=int, default=20, help="Times each page is fetched")
+
+
+def timed(fetch, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fetch()
+    return round((time.perf_counter() - started) / repeat * 1000, 3)
+
+
+def run(options, stdout):
+    page_size, repeat = options['page_size'], options['repeat']
+    results = {}
+    with benchmark_environment(options['redis_url'], fake_redis=options['fake_redis']):
+        seed_faqs(options['faqs'])
+        active = FAQ.objects.filter(is_active=True).order_by('id')
+        ids = list(active.values_list('id', flat=True))
+        stdout.write(f"{'depth':>8} {'cursor ms':>10} {'offset ms':>10}")
+        for fraction in (0, 0.5, 0.99):
+            offset = int(len(ids) * fraction)
+            # The cursor of a page is the id of the last FAQ before it
+            position = ids[offset - 1] if offset else 0
+            keyset = timed(lambda: list(active.filter(id__gt=position)[:page_size]), repeat)
+            offset_ms = timed(lambda: list(active[offset:offset + page_size]), repeat)
+            results[offset] = {'cursor_ms': keyset, 'offset_ms': offset_ms}
+            stdout.write(f"{offset:>8} {keyset:>10.3f} {offset_ms:>10.3f}")
+    return results
@@ -0,0 +1,49 @@
+"""Count the Redis commands issued by one FAQ list page request."""
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.urls import reverse
+from faqApp.cache import get_generation, get_response_cache
+from rest_framework.test import APIClient
+from .support import (RedisCommandCounter, benchmark_environment,
+                      cache_translations_in_redis, seed_faqs)
+
+
+def add_arguments(parser):
+    parser.add_argument('--faqs', type=int, default=1000, help="Number of FAQs to seed")
+    parser.add_argument('--lang', default='hi', help="Language requested from the list")
+    parser.add_argument('--page-size', type=int, default=100, help="FAQs per list page")
+
+
+def run(options, stdout):
+    faqs, lang, page_size = options['faqs'], options['lang'], options['page_size']
+    results = {}
+    with benchmark_environment(options['redis_url'], fake_redis=options['fake_redis']):
+        seed_faqs(faqs, langs=[lang])
+        client = APIClient()
+        url = f"{reverse('faq-list')}?lang={lang}&page_size={page_size}"
+
+        def measure(name):
+            with RedisCommandCounter() as counter:
+                response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} answered {response.status_code}")
+            results[name] = counter
+            stdout.write(
+                f"{name:<32} {counter.total:>6} commands {counter.round_trips:>6} round trips "
+                f"{counter.total / min(faqs, page_size):>8.3f} per FAQ  {dict(counter.commands)}"
+            )
+
+        stdout.write(f"List page of {min(faqs, page_size)} out of {faqs} FAQs, lang={lang}")
+        get_generation('list')
+        measure('miss, translations not in Redis')
+        cache.clear()
+        get_response_cache().clear()
+        get_generation('list')
+        cache_translations_in_redis(lang)
+        measure('miss, translations in Redis')
+        get_response_cache().clear()
+        get_generation('list')
+        measure('hit, Redis tier')
+        measure('hit, local tier')
+    return {name: {'commands': dict(counter.commands), 'round_trips': counter.round_trips}
+            for name, counter in results.items()}
@@ -0,0 +1,80 @@
+"""Search latency of the inverted index against LIKE scans, at a realistic corpus size."""
+import random
+import time
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp.models import FAQ, SearchPosting
+from .support import benchmark_environment, seed_faqs
+
+WORDS = (
+    "account password reset login email invoice refund payment card subscription plan "
+    "upgrade cancel billing address delivery order shipping return warranty device app "
+    "install update error support contact language settings privacy data export delete "
+    "profile notification security verify phone code trial discount coupon tax receipt"
+).split()
+# A long tail of rarer terms, so posting lists have realistic lengths
+VOCABULARY = WORDS + [f"term{i}" for i in range(2000)]
+
+
+def add_arguments(parser):
+    parser.add_argument('--faqs', type=int, default=100000, help="Number of FAQs to seed")
+    parser.add_argument('--queries', type=int, default=200, help="Searches to time")
+    parser.add_argument('--like-queries', type=int, default=20,
+                        help="LIKE scans to time (they are much slower)")
+
+
+def timed(callable_, queries):
+    started = time.perf_counter()
+    for query in queries:
+        callable_(query)
+    elapsed = time.perf_counter() - started
+    return {'mean_ms': round(elapsed / len(queries) * 1000, 3),
+            'queries_per_second': round(len(queries) / elapsed, 1)}
+
+
+def like_scan(query):
+    # What the admin changelist search does: every word must appear in some
+    # field, and the matches are counted for the paginator
+    condition = Q()
+    for word in query.split():
+        condition &= Q(question__icontains=word) | Q(answer__icontains=word)
+    matches = FAQ.objects.filter(condition)
+    return matches.count(), list(matches.order_by('-id').values_list('id', flat=True)[:20])
+
+
+def run(options, stdout):
+    rng = random.Random(1)
+    queries = [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(options['queries'])]
+    results = {}
+    with benchmark_environment(options['redis_url'], fake_redis=options['fake_redis']):
+        started = time.perf_counter()
+        seed_faqs(options['faqs'], words=VOCABULARY)
+        stdout.write(f"Seeded {options['faqs']} FAQs in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        call_command('rebuild_search_index', stdout=StringIO())
+        results['index_build_seconds'] = round(time.perf_counter() - started, 2)
+        results['postings'] = SearchPosting.objects.count()
+        stdout.write(f"Built {results['postings']} postings in {results['index_build_seconds']}s")
+
+        client = APIClient()
+        url = reverse('faq-search')
+        results['index'] = timed(lambda query: SearchPosting.search(query), queries)
+        results['endpoint'] = timed(lambda query: client.get(url, {'q': query}), queries)
+        results['like_scan'] = timed(like_scan, queries[:options['like_queries']])
+
+        faq = FAQ.objects.order_by('id').first()
+        started = time.perf_counter()
+        faq.question = f"{faq.question} updated"
+        faq.save()
+        results['incremental_update_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+        for name in ('index', 'endpoint', 'like_scan'):
+            stdout.write(f"{name:<10} {results[name]['mean_ms']:>10.3f} ms/query "
+                         f"{results[name]['queries_per_second']:>9.1f} queries/s")
+        stdout.write("Saving one FAQ, index update included: "
+                     f"{results['incremental_update_ms']} ms")
+    return results
@@ -0,0 +1,194 @@
+import json
+import math
+import platform
+import random
+from collections import Counter
+from contextlib import contextmanager
+from unittest import mock
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django_redis import get_redis_connection
+from redis.client import Pipeline, Redis
+from faqApp.compression import compress
+from faqApp.models import FAQ, FAQTranslation, TRANSLATABLE_FIELDS, source_hash
+
+
+class RedisCommandCounter:
+    """Count the Redis commands and network round trips issued inside the block."""
+
+    def __init__(self):
+        self.commands = Counter()
+        self.round_trips = 0
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+    def __enter__(self):
+        counter = self
+        execute_command = Redis.execute_command
+        execute_pipeline = Pipeline.execute
+
+        def counted_command(client, *args, **kwargs):
+            counter.commands[str(args[0]).upper()] += 1
+            counter.round_trips += 1
+            return execute_command(client, *args, **kwargs)
+
+        def counted_pipeline(pipe, *args, **kwargs):
+            for command_args, _ in pipe.command_stack:
+                counter.commands[str(command_args[0]).upper()] += 1
+            counter.round_trips += 1
+            return execute_pipeline(pipe, *args, **kwargs)
+
+        self._patches = [
+            mock.patch.object(Redis, 'execute_command', counted_command),
+            mock.patch.object(Pipeline, 'execute', counted_pipeline),
+        ]
+        for patch in self._patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for patch in reversed(self._patches):
+            patch.stop()
+
+
+@contextmanager
+def benchmark_environment(redis_url, fake_redis=False):
+    """Run against a throwaway test database and a dedicated, flushed Redis database.
+
+    With `fake_redis`, Redis is an in-process fakeredis server instead, so no
+    service is needed; its timings then leave out the network.
+    """
+    caches = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": redis_url,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            }
+        }
+    }
+    if fake_redis:
+        try:
+            import fakeredis
+        except ImportError:
+            raise CommandError("--fake-redis needs the fakeredis package")
+        from fakeredis import aioredis as fake_aioredis
+        server = fakeredis.FakeServer()
+        caches["default"]["OPTIONS"].update({
+            "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection,
+                                       "server": server},
+            "ASYNC_CONNECTION_POOL_KWARGS": {"connection_class": fake_aioredis.FakeConnection,
+                                             "server": server},
+        })
+    old_name = connection.settings_dict['NAME']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(CACHES=caches):
+            get_redis_connection("default").flushdb()
+            yield
+            get_redis_connection("default").flushdb()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def random_text(rng, words, length):
+    return ' '.join(rng.choice(words) for _ in range(length))
+
+
+def seed_faqs(count, langs=(), batch_size=1000, words=None, seed=0, first=0):
+    """Create `count` FAQs with stored translations for `langs`.
+
+    With `words`, questions and answers are random sentences drawn from it,
+    otherwise they are numbered from `first`.
+    Bulk inserts skip FAQ.save(), so the search index is left empty.
+    """
+    rng = random.Random(seed)
+    for start in range(0, count, batch_size):
+        faqs = FAQ.objects.bulk_create([
+            FAQ(question=f"{random_text(rng, words, 6)}?",
+                answer=f"<p>{random_text(rng, words, 30)}</p>")
+            if words else
+            FAQ(question=f"Question {first + i}?", answer=f"<p>Answer {first + i}</p>")
+            for i in range(start, min(start + batch_size, count))
+        ])
+        FAQTranslation.objects.bulk_create([
+            FAQTranslation(faq=faq, lang=lang, field=field,
+                           text=f"[{lang}] {getattr(faq, field)}",
+                           source_hash=source_hash(getattr(faq, field)))
+            for faq in faqs
+            for lang in langs
+            for field in TRANSLATABLE_FIELDS
+        ])
+
+
+def cache_translations_in_redis(lang):
+    """Copy every stored translation for `lang` into the per-field Redis keys."""
+    redis_client = get_redis_connection("default")
+    pipe = redis_client.pipeline(transaction=False)
+    rows = FAQTranslation.objects.filter(lang=lang).values_list('faq_id', 'field', 'text')
+    for faq_id, field, text in rows.iterator():
+        pipe.set(FAQ.translation_cache_key(faq_id, field, lang), compress(text), ex=3600)
+    pipe.execute()
+
+
+def latency_stats(seconds):
+    """Summarize per-request latencies, timed one request after another."""
+    ordered = sorted(seconds)
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+                     * 1000, 3)
+
+    return {
+        'requests': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'requests_per_second': round(len(ordered) / sum(ordered), 1),
+    }
+
+
+def write_results(path, benchmark, options, results):
+    document = {
+        'benchmark': benchmark,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'options': options,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(document, output, indent=2, sort_keys=True, default=str)
+
+
+def flatten(results, prefix=''):
+    """Map 'a.b.c' paths to the numeric leaves of nested results."""
+    leaves = {}
+    for key, value in results.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            leaves.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            leaves[path] = value
+    return leaves
+
+
+def compare_results(previous, results, threshold):
+    """Yield (path, before, after, change, regressed) for the numbers both runs have.
+
+    Throughput (per_second) should go up; everything else, times and counts,
+    should go down. A change worse than `threshold` (a fraction) is a regression.
+    """
+    before, after = flatten(previous), flatten(results)
+    for path in sorted(before.keys() & after.keys()):
+        if not before[path]:
+            continue
+        change = (after[path] - before[path]) / before[path]
+        worse = -change if 'per_second' in path else change
+        yield path, before[path], after[path], change, worse > threshold
@@ -0,0 +1,532 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from .circuit import REDIS_ERRORS, RedisUnavailable, breaker
+from .metrics import AsyncInstrumentedConnection, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Dependency sets outlive the entries they point at; stale members are harmless.
+DEPENDENCY_TTL = 60 * 60 * 2
+
+# Generations are the time of the last write in milliseconds, kept strictly
+# increasing, so a generation key lost to eviction restarts above any
+# generation still embedded in live cache keys.
+BUMP_GENERATION_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local generation = math.max(current + 1, tonumber(ARGV[1]))
+redis.call('SET', KEYS[1], generation)
+return generation
+"""
+
+# Delete every key recorded in the dependency set, then the set itself, atomically.
+INVALIDATE_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+for i = 1, #keys, 500 do
+    redis.call('DEL', unpack(keys, i, math.min(i + 499, #keys)))
+end
+redis.call('DEL', KEYS[1])
+return keys
+"""
+
+
+# Redis writes that failed, redone once Redis is reachable again; past the cap
+# they are replaced by dropping every list and detail entry.
+MAX_DEFERRED_WRITES = 1000
+_deferred_writes = []
+_deferred_lock = threading.Lock()
+
+
+def log_redis_error(action, error):
+    """Log a Redis failure a caller degrades around; quietly while the circuit is open."""
+    if isinstance(error, RedisUnavailable):
+        logger.debug("%s skipped: %s", action, error)
+    else:
+        logger.warning("%s failed: %s", action, error)
+
+
+def defer_until_recovered(action, error, write):
+    """Record that `write` failed, to run it again when the circuit closes."""
+    log_redis_error(action, error)
+    with _deferred_lock:
+        if len(_deferred_writes) < MAX_DEFERRED_WRITES:
+            _deferred_writes.append(write)
+        else:
+            _deferred_writes[:] = [invalidate]
+
+
+def replay_deferred_writes():
+    with _deferred_lock:
+        writes = list(_deferred_writes)
+        _deferred_writes.clear()
+    for write in writes:
+        try:
+            write()
+        except REDIS_ERRORS as e:
+            defer_until_recovered("Replaying a deferred cache write", e, write)
+
+
+def _on_recover():
+    # Off the thread whose call closed the circuit, which may be serving a request
+    threading.Thread(target=replay_deferred_writes, name='faq-cache-recovery',
+                     daemon=True).start()
+
+
+breaker.on_recover(_on_recover)
+
+
+def generation_key(namespace):
+    return f"{settings.CACHE_KEY_PREFIX}generation_{namespace}"
+
+
+def get_generation(namespace):
+    """Return the current generation that keys of `namespace` embed."""
+    response_cache = get_response_cache()
+    generation = response_cache.get(generation_key(namespace))
+    if generation is None:
+        cache.add(generation_key(namespace), int(time.time() * 1000), timeout=None)
+        generation = response_cache.get(generation_key(namespace))
+    return generation if generation is not None else fallback_generation(namespace)
+
+
+async def aget_generation(namespace):
+    """Like get_generation(), through the asyncio Redis client."""
+    response_cache = get_response_cache()
+    generation = await response_cache.aget(generation_key(namespace))
+    if generation is None:
+        try:
+            await get_async_redis().set(cache.make_key(generation_key(namespace)),
+                                        cache.client.encode(int(time.time() * 1000)), nx=True)
+        except REDIS_ERRORS as e:
+            log_redis_error("Creating a generation", e)
+        generation = await response_cache.aget(generation_key(namespace))
+    return generation if generation is not None else fallback_generation(namespace)
+
+
+def fallback_generation(namespace):
+    """A generation for while Redis is unreachable, kept in the local tier only.
+
+    Failed invalidations clear the local tier, so writes still start a new one.
+    """
+    local = get_response_cache().local
+    redis_key = cache.make_key(generation_key(namespace))
+    hit, generation = local.get(redis_key)
+    if not hit:
+        generation = int(time.time() * 1000)
+        local.set(redis_key, generation)
+    return generation
+
+
+def generation_timestamp(generation):
+    """The Unix time of the write that produced `generation`."""
+    return generation / 1000
+
+
+def bump_generation(namespace):
+    """Invalidate every entry of `namespace` with a single atomic Redis call.
+
+    Entries under the old generation are never read again and expire via TTL.
+    """
+    redis_client = get_redis_connection("default")
+    redis_key = cache.make_key(generation_key(namespace))
+    try:
+        generation = redis_client.eval(
+            BUMP_GENERATION_SCRIPT, 1, redis_key, int(time.time() * 1000))
+    except REDIS_ERRORS as e:
+        # Nothing local can be trusted to be current; Redis catches up on recovery
+        get_response_cache().local.clear()
+        defer_until_recovered(f"Bumping the {namespace} generation", e,
+                              lambda: bump_generation(namespace))
+        return None
+    get_response_cache().evict([redis_key])
+    return generation
+
+
+def dependency_key(faq_id):
+    return f"{settings.CACHE_KEY_PREFIX}deps_{faq_id}"
+
+
+def track_dependencies(key, faq_ids, raw=False):
+    """Record that the cache entry `key` holds data of the FAQs in `faq_ids`.
+
+    `key` is a django cache key, or a Redis key when `raw` is set.
+    """
+    redis_key = key if raw else cache.make_key(key)
+    redis_client = get_redis_connection("default")
+    pipe = redis_client.pipeline(transaction=False)
+    for faq_id in faq_ids:
+        pipe.sadd(dependency_key(faq_id), redis_key)
+        pipe.expire(dependency_key(faq_id), DEPENDENCY_TTL)
+    try:
+        pipe.execute()
+    except REDIS_ERRORS as e:
+        # The entry may have reached Redis untracked, where no write could evict it
+        defer_until_recovered("Tracking dependencies", e,
+                              lambda: get_redis_connection("default").delete(redis_key))
+
+
+async def atrack_dependencies(key, faq_ids, raw=False):
+    """Like track_dependencies(), through the asyncio Redis client."""
+    redis_key = key if raw else cache.make_key(key)
+    pipe = get_async_redis().pipeline(transaction=False)
+    for faq_id in faq_ids:
+        pipe.sadd(dependency_key(faq_id), redis_key)
+        pipe.expire(dependency_key(faq_id), DEPENDENCY_TTL)
+    try:
+        await pipe.execute()
+    except REDIS_ERRORS as e:
+        defer_until_recovered("Tracking dependencies", e,
+                              lambda: get_redis_connection("default").delete(redis_key))
+
+
+def invalidate_faq(faq_id):
+    """Evict every cache entry recorded as depending on one FAQ."""
+    return invalidate_faqs([faq_id])
+
+
+def invalidate_faqs(faq_ids):
+    """Evict the cache entries depending on any of `faq_ids`, in one round trip."""
+    if not faq_ids:
+        return 0
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    for faq_id in faq_ids:
+        pipe.eval(INVALIDATE_SCRIPT, 1, dependency_key(faq_id))
+    try:
+        results = pipe.execute()
+    except REDIS_ERRORS as e:
+        get_response_cache().local.clear()
+        defer_until_recovered("Invalidating FAQs", e, lambda: invalidate_faqs(faq_ids))
+        return 0
+    keys = [key.decode() for evicted in results for key in evicted]
+    get_response_cache().evict(keys)
+    return len(keys)
+
+
+def invalidate(faq_id=None, list_changed=True):
+    """Evict the cache entries a write affects.
+
+    Entries holding one FAQ are evicted through its dependency set. Creating
+    or deleting an FAQ shifts every list page, so `list_changed` also bumps
+    the list generation. Without an FAQ id every list and detail entry goes.
+    """
+    if faq_id is None:
+        bump_generation('detail')
+    else:
+        invalidate_faq(faq_id)
+    if list_changed or faq_id is None:
+        bump_generation('list')
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with a per-entry TTL.
+
+    Values are shared between requests as-is and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, timeout=30):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, timeout=None):
+        if self.max_entries <= 0:
+            return
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LocalInvalidationBus:
+    """In-process stand-in for the Redis bus, delivering messages synchronously.
+
+    All instances share one channel, like workers subscribed to the same Redis.
+    Each keeps its own subscribers, which go away with it.
+    """
+
+    _buses = weakref.WeakSet()
+
+    def __init__(self):
+        self._subscribers = []
+        self._buses.add(self)
+
+    def publish(self, keys):
+        for bus in list(self._buses):
+            for callback in list(bus._subscribers):
+                callback(keys)
+
+    def subscribe(self, callback, on_error=None):
+        self._subscribers.append(callback)
+
+
+class RedisInvalidationBus:
+    """Broadcast evicted keys to every worker process over Redis pub/sub."""
+
+    def __init__(self):
+        self.channel = f"{settings.CACHE_KEY_PREFIX}invalidations"
+        self._thread = None
+
+    def publish(self, keys):
+        try:
+            get_redis_connection("default").publish(self.channel, json.dumps(list(keys)))
+        except Exception as e:
+            logger.warning("Could not publish cache invalidation: %s", e)
+
+    def subscribe(self, callback, on_error=None):
+        def handle(message):
+            callback(json.loads(message['data']))
+
+        def handle_error(error, pubsub, thread):
+            # Messages may have been missed while disconnected
+            logger.warning("Cache invalidation listener error: %s", error)
+            if on_error:
+                on_error()
+            time.sleep(1)
+
+        pubsub = get_redis_connection("default").pubsub()
+        try:
+            pubsub.subscribe(**{self.channel: handle})
+        except REDIS_ERRORS as e:
+            # Keep serving without the bus; the local TTL bounds staleness meanwhile
+            logger.warning("Could not subscribe to cache invalidations, retrying: %s", e)
+            retry = threading.Timer(5, self.subscribe, (callback, on_error))
+            retry.daemon = True
+            retry.start()
+            return
+        self._thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=handle_error
+        )
+
+
+class TwoTierCache:
+    """Serve FAQ response keys from a LocalCache in front of the default cache.
+
+    Evictions are applied locally and broadcast to the other workers through
+    the invalidation bus; the local TTL bounds staleness if a message is lost.
+    While Redis is unreachable the local tier serves alone.
+    """
+
+    def __init__(self, max_entries=1024, timeout=30,
+                 invalidation_bus='faqApp.cache.RedisInvalidationBus'):
+        self.local = LocalCache(max_entries=max_entries, timeout=timeout)
+        self.stats = Counter()
+        # Request threads share the counters, and += on a Counter is not atomic
+        self._stats_lock = threading.Lock()
+        self.bus = import_string(invalidation_bus)()
+        self.bus.subscribe(self.local.delete_many, on_error=self.local.clear)
+
+    def get(self, key):
+        hit, value = self.get_local(key)
+        if hit:
+            return value
+        try:
+            value = cache.get(key)
+        except REDIS_ERRORS as e:
+            log_redis_error("Reading the response cache", e)
+            value = None
+        return self.fill_local(key, value)
+
+    async def aget(self, key):
+        """Like get(), reading Redis through the asyncio client."""
+        hit, value = self.get_local(key)
+        if hit:
+            return value
+        try:
+            raw = await get_async_redis().get(cache.make_key(key))
+        except REDIS_ERRORS as e:
+            log_redis_error("Reading the response cache", e)
+            raw = None
+        return self.fill_local(key, None if raw is None else cache.client.decode(raw))
+
+    def get_local(self, key):
+        hit, value = self.local.get(cache.make_key(key))
+        self.count('local_hits' if hit else 'local_misses')
+        record_cache_lookup('local', hit)
+        return hit, value
+
+    def fill_local(self, key, value):
+        record_cache_lookup('redis', value is not None)
+        if value is None:
+            self.count('redis_misses')
+        else:
+            self.count('redis_hits')
+            self.local.set(cache.make_key(key), value)
+        return value
+
+    def set(self, key, value, timeout=None):
+        try:
+            cache.set(key, value, timeout=timeout)
+        except REDIS_ERRORS as e:
+            log_redis_error("Writing the response cache", e)
+        self.local.set(cache.make_key(key), value, timeout)
+
+    async def aset(self, key, value, timeout):
+        """Like set(), through the asyncio client; a `timeout` of None never expires."""
+        try:
+            await get_async_redis().set(
+                cache.make_key(key), cache.client.encode(value), ex=timeout)
+        except REDIS_ERRORS as e:
+            log_redis_error("Writing the response cache", e)
+        self.local.set(cache.make_key(key), value, timeout)
+
+    def evict(self, redis_keys):
+        """Drop Redis keys already deleted or superseded from every worker's local tier."""
+        if redis_keys:
+            self.local.delete_many(redis_keys)
+            self.bus.publish(redis_keys)
+
+    def clear(self):
+        self.local.clear()
+        with self._stats_lock:
+            self.stats.clear()
+
+    def count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def hit_ratios(self):
+        def tier(hits, misses):
+            total = hits + misses
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / total, 4) if total else None,
+            }
+
+        with self._stats_lock:
+            stats = self.stats.copy()
+        return {
+            'local': dict(tier(stats['local_hits'], stats['local_misses']),
+                          entries=len(self.local), max_entries=self.local.max_entries),
+            'redis': tier(stats['redis_hits'], stats['redis_misses']),
+        }
+
+
+DEFAULT_LOCAL_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 30,
+    'INVALIDATION_BUS': 'faqApp.cache.RedisInvalidationBus',
+}
+
+_response_caches = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return this process's TwoTierCache, configured by FAQ_LOCAL_CACHE."""
+    config = getattr(settings, 'FAQ_LOCAL_CACHE', DEFAULT_LOCAL_CACHE)
+    key = tuple(sorted(config.items()))
+    with _response_caches_lock:
+        if key not in _response_caches:
+            _response_caches[key] = TwoTierCache(
+                max_entries=config['MAX_ENTRIES'],
+                timeout=config['TIMEOUT'],
+                invalidation_bus=config['INVALIDATION_BUS'],
+            )
+        return _response_caches[key]
+
+
+def revalidate(key, rebuild, lease):
+    """Run `rebuild` in a background thread, unless some worker already is for `key`.
+
+    The Redis lease is held until `rebuild` returns, or for at most `lease`
+    seconds. Once it has, the other workers drop their local copy of `key` so
+    they read the new entry. Returns the started thread, or None.
+    """
+    redis_client = get_redis_connection("default")
+    refresh_key = f'{key}_refresh'
+    try:
+        if not redis_client.set(refresh_key, 1, nx=True, ex=lease):
+            return None
+    except REDIS_ERRORS as e:
+        # Keep serving the stale entry; the refresh can wait for Redis
+        log_redis_error("Taking the refresh lease", e)
+        return None
+
+    def run():
+        close_old_connections()
+        try:
+            rebuild()
+        except Exception as e:
+            logger.warning("Refreshing %s failed: %s", key, e)
+        else:
+            get_response_cache().evict([cache.make_key(key)])
+        finally:
+            try:
+                redis_client.delete(refresh_key)
+            except REDIS_ERRORS as e:
+                log_redis_error("Releasing the refresh lease", e)
+            close_old_connections()
+
+    thread = threading.Thread(target=run, name='faq-cache-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+_async_redis_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis():
+    """Return an asyncio client for the default cache's Redis, one per event loop.
+
+    OPTIONS['ASYNC_CONNECTION_POOL_KWARGS'] and OPTIONS['ASYNC_REDIS_CLIENT_CLASS']
+    play the parts CONNECTION_POOL_KWARGS and REDIS_CLIENT_CLASS play for django-redis.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_redis_clients.get(loop)
+    if client is None:
+        config = settings.CACHES['default']
+        location = config['LOCATION']
+        if isinstance(location, (list, tuple)):
+            location = location[0]
+        options = config.get('OPTIONS', {})
+        url = location.split(',')[0]
+        kwargs = dict(options.get('ASYNC_CONNECTION_POOL_KWARGS', {}))
+        if url.startswith('redis://'):
+            kwargs.setdefault('connection_class', AsyncInstrumentedConnection)
+        client_class = import_string(
+            options.get('ASYNC_REDIS_CLIENT_CLASS', 'redis.asyncio.Redis'))
+        client = _async_redis_clients[loop] = client_class.from_url(
+            url,
+            socket_timeout=options.get('SOCKET_TIMEOUT'),
+            socket_connect_timeout=options.get('SOCKET_CONNECT_TIMEOUT'),
+            **kwargs,
+        )
+    return client
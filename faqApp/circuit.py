@@ -0,0 +1,169 @@
+"""Circuit breaker in front of Redis.
+
+After FAILURE_THRESHOLD consecutive connection errors or timeouts the circuit
+opens: every Redis call then fails at once with RedisUnavailable instead of
+waiting out socket timeouts, and callers fall back to the in-process cache.
+RESET_TIMEOUT seconds later a single trial call is let through; when it
+succeeds the circuit closes and the recovery callbacks run.
+
+The breaker belongs to one worker process, like the local cache tier.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from redis import Redis
+from redis.asyncio.client import Pipeline as AsyncPipeline, Redis as AsyncRedis
+from redis.client import Pipeline
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 3,
+    'RESET_TIMEOUT': 5,
+}
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+class RedisUnavailable(ConnectionError):
+    """Raised instead of calling Redis while the circuit is open."""
+
+
+# What callers catch to degrade; RedisUnavailable is a ConnectionError too
+REDIS_ERRORS = (ConnectionError, TimeoutError)
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self._trial_running = False
+        self._recovery_callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        return getattr(settings, 'FAQ_REDIS_CIRCUIT_BREAKER', DEFAULT_CIRCUIT_BREAKER)
+
+    def before_call(self):
+        """Raise RedisUnavailable unless a call may go through now."""
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if (self.state == OPEN
+                    and time.monotonic() - self.opened_at >= self.config['RESET_TIMEOUT']):
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        raise RedisUnavailable("Redis circuit is open")
+
+    def record_success(self):
+        if self.state == CLOSED and not self.failures:
+            return
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state == CLOSED:
+                return
+            self.state = CLOSED
+            callbacks = list(self._recovery_callbacks)
+        logger.warning("Redis is reachable again; circuit closed")
+        for callback in callbacks:
+            callback()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == CLOSED and self.failures < self.config['FAILURE_THRESHOLD']:
+                return
+            if self.state == CLOSED:
+                logger.warning("Redis failed %d times in a row (%s); circuit open",
+                               self.failures, error)
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def on_recover(self, callback):
+        """Call `callback` whenever the circuit closes again."""
+        with self._lock:
+            if callback not in self._recovery_callbacks:
+                self._recovery_callbacks.append(callback)
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    @contextmanager
+    def guard(self):
+        """Wrap one Redis call, failing fast while open and recording how it went."""
+        self.before_call()
+        try:
+            yield
+        except RedisUnavailable:
+            raise
+        except REDIS_ERRORS as e:
+            self.record_failure(e)
+            raise
+        except RedisError:
+            # Redis answered, it just did not like the command
+            self.record_success()
+            raise
+        except BaseException:
+            self.release_trial()
+            raise
+        self.record_success()
+
+
+breaker = CircuitBreaker()
+
+
+class BreakerPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        with breaker.guard():
+            return super().execute(raise_on_error)
+
+
+class BreakerRedis(Redis):
+    """Redis client passing every command and pipeline through the breaker.
+
+    Set as the REDIS_CLIENT_CLASS of the default cache.
+    """
+
+    def execute_command(self, *args, **options):
+        with breaker.guard():
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return BreakerPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class AsyncBreakerPipeline(AsyncPipeline):
+    async def execute(self, raise_on_error=True):
+        with breaker.guard():
+            return await super().execute(raise_on_error)
+
+
+class AsyncBreakerRedis(AsyncRedis):
+    """asyncio counterpart of BreakerRedis, sharing its breaker."""
+
+    async def execute_command(self, *args, **options):
+        with breaker.guard():
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return AsyncBreakerPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint)
@@ -0,0 +1,56 @@
+"""Transparent compression of cached values.
+
+Values of at least FAQ_CACHE_COMPRESS_MIN_LENGTH bytes are stored compressed,
+with lz4 when it is installed and zlib otherwise. Compressed values start with
+a marker byte no text, JSON or pickle starts with, so values written before
+compression was enabled, or too short to compress, read back unchanged.
+"""
+import zlib
+from django.conf import settings
+from django_redis.compressors.base import BaseCompressor
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+DEFAULT_MIN_LENGTH = 1024
+ZLIB_MARKER = b'\x00z'
+LZ4_MARKER = b'\x00l'
+ZLIB_LEVEL = 6
+
+
+def compress(value):
+    """Return `value` (str or bytes) compressed, or unchanged if that would not pay off."""
+    data = value.encode('utf-8') if isinstance(value, str) else value
+    if len(data) < getattr(settings, 'FAQ_CACHE_COMPRESS_MIN_LENGTH', DEFAULT_MIN_LENGTH):
+        return value
+    if lz4 is not None:
+        compressed = LZ4_MARKER + lz4.frame.compress(data)
+    else:
+        compressed = ZLIB_MARKER + zlib.compress(data, ZLIB_LEVEL)
+    # Already compressed bodies (e.g. gzip variants) would only grow
+    return compressed if len(compressed) < len(data) else value
+
+
+def decompress(value):
+    """Reverse compress(); bytes that were stored uncompressed are returned as they are."""
+    if value is None or value[:1] != b'\x00':
+        return value
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(value[len(ZLIB_MARKER):])
+    if value.startswith(LZ4_MARKER):
+        if lz4 is None:
+            raise RuntimeError("A cached value is lz4-compressed but lz4 is not installed")
+        return lz4.frame.decompress(value[len(LZ4_MARKER):])
+    return value
+
+
+class CacheCompressor(BaseCompressor):
+    """django-redis COMPRESSOR applying compress() to every cached value."""
+
+    def compress(self, value):
+        return compress(value)
+
+    def decompress(self, value):
+        return decompress(value)
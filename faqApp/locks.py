@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+
+# Delete the lock only if it still holds our token, so an expired lease that
+# another worker has since taken over is never released by the old owner.
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+_local_locks = weakref.WeakValueDictionary()
+_local_locks_guard = threading.Lock()
+
+
+def local_lock(key):
+    """A lock for `key` shared by the threads of this process.
+
+    What single_flight() falls back to when Redis cannot hand out leases.
+    """
+    with _local_locks_guard:
+        lock = _local_locks.get(key)
+        if lock is None:
+            lock = _local_locks[key] = threading.Lock()
+        return lock
+
+
+def single_flight(redis_client, key, fetch, compute, lease=30, wait=10, poll=0.05,
+                  wait_fetch=None):
+    """Coalesce concurrent computations of the same value across workers.
+
+    `fetch` returns the published value or None. The worker that takes the
+    Redis lease for `key` runs `compute`, which must publish the value before
+    returning; every other caller polls `fetch` until it appears. Waiters poll
+    `wait_fetch` instead when given, which may also return results published
+    only for them. Returns None if nothing was published within `wait` seconds.
+    """
+    lock_key = f'{key}_lock'
+    deadline = time.monotonic() + wait
+    value = fetch()
+    while True:
+        if value is not None:
+            return value
+
+        token = uuid.uuid4().hex
+        if redis_client.set(lock_key, token, nx=True, px=int(lease * 1000)):
+            try:
+                # Another leader may have published between our fetch and the lock
+                value = fetch()
+                return value if value is not None else compute()
+            finally:
+                redis_client.eval(RELEASE_SCRIPT, 1, lock_key, token)
+
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll)
+        value = (wait_fetch or fetch)()
+
+
+async def asingle_flight(redis_client, key, fetch, compute, lease=30, wait=10, poll=0.05,
+                         wait_fetch=None):
+    """Like single_flight(), with an asyncio Redis client and coroutine functions."""
+    lock_key = f'{key}_lock'
+    deadline = time.monotonic() + wait
+    value = await fetch()
+    while True:
+        if value is not None:
+            return value
+
+        token = uuid.uuid4().hex
+        if await redis_client.set(lock_key, token, nx=True, px=int(lease * 1000)):
+            try:
+                value = await fetch()
+                return value if value is not None else await compute()
+            finally:
+                await redis_client.eval(RELEASE_SCRIPT, 1, lock_key, token)
+
+        if time.monotonic() >= deadline:
+            return None
+        await asyncio.sleep(poll)
+        value = await (wait_fetch or fetch)()
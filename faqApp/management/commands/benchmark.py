@@ -0,0 +1,57 @@
+import importlib
+import json
+import pkgutil
+from django.core.management.base import BaseCommand, CommandError
+import faqApp.benchmarks
+from faqApp.benchmarks.support import compare_results, write_results
+
+
+class Command(BaseCommand):
+    help = "Run a benchmark from faqApp.benchmarks against a throwaway database"
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='benchmark', required=True)
+        for module_info in pkgutil.iter_modules(faqApp.benchmarks.__path__):
+            if module_info.name == 'support':
+                continue
+            module = importlib.import_module(f'faqApp.benchmarks.{module_info.name}')
+            subparser = subparsers.add_parser(module_info.name, help=module.__doc__)
+            subparser.add_argument('--redis-url', default='redis://localhost:6379/15',
+                                   help="Redis database to use; it is flushed")
+            subparser.add_argument('--fake-redis', action='store_true',
+                                   help="Use an in-process fakeredis server instead")
+            subparser.add_argument('--output', help="Write the results to this JSON file")
+            subparser.add_argument('--compare',
+                                   help="JSON results of an earlier run to compare against")
+            subparser.add_argument('--threshold', type=float, default=0.1,
+                                   help="Relative change reported as a regression")
+            module.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        try:
+            module = importlib.import_module(f"faqApp.benchmarks.{options['benchmark']}")
+        except ImportError as e:
+            raise CommandError(f"Unknown benchmark: {options['benchmark']}") from e
+        previous = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as earlier:
+                previous = json.load(earlier)
+            if previous.get('benchmark') != options['benchmark']:
+                raise CommandError(f"{options['compare']} holds results of another benchmark")
+
+        results = module.run(options, self.stdout)
+
+        if options['output']:
+            write_results(options['output'], options['benchmark'],
+                          {key: value for key, value in options.items()
+                           if key not in ('stdout', 'stderr')},
+                          results)
+            self.stdout.write(f"Results written to {options['output']}")
+        if previous is not None:
+            regressions = 0
+            for path, before, after, change, regressed in compare_results(
+                    previous['results'], results, options['threshold']):
+                regressions += regressed
+                self.stdout.write(f"{'REGRESSION ' if regressed else '':<11}{path:<60} "
+                                  f"{before:>12} -> {after:<12} {change:+.1%}")
+            self.stdout.write(f"{regressions} regressions beyond {options['threshold']:.0%}")
@@ -0,0 +1,50 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from faqApp.models import FAQ, FAQTranslation
+
+
+class Command(BaseCommand):
+    help = "Stream FAQs and their translations as NDJSON, one FAQ per line"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help="File to write, or - for stdout (the default)")
+        parser.add_argument('--langs',
+                            help="Comma-separated languages to include; all by default")
+        parser.add_argument('--active-only', action='store_true',
+                            help="Skip inactive FAQs")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="FAQs loaded from the database at a time")
+
+    def handle(self, *args, **options):
+        translations = FAQTranslation.objects.order_by('lang', 'field')
+        if options['langs']:
+            translations = translations.filter(lang__in=options['langs'].split(','))
+        queryset = FAQ.objects.order_by('id').prefetch_related(
+            Prefetch('translations', queryset=translations))
+        if options['active_only']:
+            queryset = queryset.filter(is_active=True)
+
+        stream = (self.stdout if options['output'] == '-'
+                  else open(options['output'], 'w', encoding='utf-8'))
+        exported = 0
+        try:
+            # iterator() keeps memory flat: one chunk of FAQs and their translations at a time
+            for faq in queryset.iterator(chunk_size=options['chunk_size']):
+                item = {
+                    'id': faq.id,
+                    'question': faq.question,
+                    'answer': faq.answer,
+                    'is_active': faq.is_active,
+                    'translations': {},
+                }
+                for translation in faq.translations.all():
+                    item['translations'].setdefault(translation.lang, {})[translation.field] = (
+                        translation.text)
+                stream.write(json.dumps(item, ensure_ascii=False) + '\n')
+                exported += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        self.stderr.write(f"Exported {exported} FAQs")
@@ -0,0 +1,137 @@
+import json
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from faqApp.cache import invalidate, invalidate_faqs
+from faqApp.models import (FAQ, FAQChange, FAQTranslation, SearchPosting, TRANSLATABLE_FIELDS,
+                           source_hash)
+
+FAQ_FIELDS = ('question', 'answer', 'is_active')
+
+
+class Command(BaseCommand):
+    help = ("Import FAQs from NDJSON, one object per line as written by export_faqs. "
+            "Lines with an existing id update that FAQ; batches before an invalid "
+            "line stay imported")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file to read, or - for stdin")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="FAQs written per bulk statement")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        self.stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'translations': 0}
+        self.explicit_ids = False
+        started = time.monotonic()
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            batch = []
+            for line_number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                batch.append(self.parse(line, line_number))
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # Every list and detail entry goes at once, instead of once per FAQ
+            if self.stats['created'] or self.stats['updated'] or self.stats['translations']:
+                invalidate()
+            if self.explicit_ids:
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), [FAQ]):
+                        cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {self.stats['created']}, updated {self.stats['updated']} and left "
+            f"{self.stats['unchanged']} unchanged FAQs, stored {self.stats['translations']} "
+            f"translations in {time.monotonic() - started:.2f}s"
+        ))
+
+    def parse(self, line, line_number):
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise CommandError(f"Line {line_number}: invalid JSON ({e})")
+        if not isinstance(item, dict) or not all(
+                isinstance(item.get(field), str) for field in ('question', 'answer')):
+            raise CommandError(f"Line {line_number}: 'question' and 'answer' strings are required")
+        if 'id' in item and not isinstance(item['id'], int):
+            raise CommandError(f"Line {line_number}: 'id' must be an integer")
+        translations = item.get('translations') or {}
+        if not isinstance(translations, dict) or not all(
+                isinstance(fields, dict) and set(fields) <= set(TRANSLATABLE_FIELDS)
+                and all(isinstance(text, str) for text in fields.values())
+                for fields in translations.values()):
+            raise CommandError(
+                f"Line {line_number}: 'translations' must map languages to "
+                f"{{{', '.join(TRANSLATABLE_FIELDS)}}} objects")
+        return item
+
+    @transaction.atomic
+    def import_batch(self, items):
+        ids = [item['id'] for item in items if 'id' in item]
+        existing = FAQ.objects.in_bulk(ids)
+        to_create, to_update, changed_text = [], [], []
+        faqs = []
+        for item in items:
+            faq = existing.get(item.get('id'))
+            if faq is None:
+                faq = FAQ(id=item.get('id'), question=item['question'], answer=item['answer'],
+                          is_active=item.get('is_active', True))
+                to_create.append(faq)
+            elif any(getattr(faq, field) != item.get(field, getattr(faq, field))
+                     for field in FAQ_FIELDS):
+                if faq.question != item['question'] or faq.answer != item['answer']:
+                    changed_text.append(faq.id)
+                for field in FAQ_FIELDS:
+                    setattr(faq, field, item.get(field, getattr(faq, field)))
+                faq.updated_at = timezone.now()
+                to_update.append(faq)
+            else:
+                self.stats['unchanged'] += 1
+            faqs.append(faq)
+
+        self.explicit_ids = self.explicit_ids or any(faq.id for faq in to_create)
+        FAQ.objects.bulk_create(to_create)
+        FAQ.objects.bulk_update(to_update, FAQ_FIELDS + ('updated_at',))
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+
+        # Translations made from the old text are dropped unless the line replaces them
+        if changed_text:
+            current = {(faq.id, field): source_hash(getattr(faq, field))
+                       for faq in to_update for field in TRANSLATABLE_FIELDS}
+            stale = [
+                (row_id, lang) for row_id, faq_id, lang, field, hash_ in
+                FAQTranslation.objects.filter(faq_id__in=changed_text).values_list(
+                    'id', 'faq_id', 'lang', 'field', 'source_hash')
+                if current[faq_id, field] != hash_
+            ]
+            FAQTranslation.objects.filter(id__in=[row_id for row_id, _ in stale]).delete()
+            SearchPosting.index(changed_text, {lang for _, lang in stale})
+            # Evicted after commit, so readers can't cache the old rows again
+            transaction.on_commit(lambda: invalidate_faqs(changed_text))
+
+        rows = [
+            FAQTranslation(faq=faq, lang=lang, field=field, text=text,
+                           source_hash=source_hash(getattr(faq, field)))
+            for faq, item in zip(faqs, items)
+            for lang, fields in (item.get('translations') or {}).items()
+            for field, text in fields.items()
+        ]
+        if rows:
+            FAQTranslation.upsert(rows)
+        self.stats['translations'] += len(rows)
+        SearchPosting.index([faq.id for faq in to_create + to_update], ['en'])
+        FAQChange.record([faq.id for faq in to_create + to_update])
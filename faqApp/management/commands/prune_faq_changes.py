@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from faqApp.models import FAQChange
+
+
+class Command(BaseCommand):
+    help = "Delete change feed entries older than FAQ_CHANGE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = FAQChange.prune()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} change feed entries"))
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from faqApp.models import FAQ, FAQTranslation, SearchPosting
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FAQ search index from the stored questions, answers and translations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="FAQs indexed per batch")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        langs = ['en'] + sorted(FAQTranslation.objects.values_list('lang', flat=True).distinct())
+        faq_ids = list(FAQ.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(faq_ids), options['chunk_size']):
+            SearchPosting.index(faq_ids[start:start + options['chunk_size']], langs)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(faq_ids)} FAQs in {len(langs)} language(s) "
+            f"({SearchPosting.objects.count()} postings) in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from faqApp.circuit import REDIS_ERRORS
+from faqApp.tasks import get_translation_queue
+
+
+class Command(BaseCommand):
+    help = "Work off queued background translations (FAQ_TRANSLATION_QUEUE must use Redis)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=int, default=5,
+                            help="Seconds to block waiting for a task")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit as soon as the queue is empty")
+
+    def handle(self, *args, **options):
+        translation_queue = get_translation_queue()
+        if not hasattr(translation_queue, 'work'):
+            raise CommandError("The configured translation queue is worked off in-process")
+
+        processed = 0
+        while True:
+            close_old_connections()
+            try:
+                worked = translation_queue.work(timeout=options['timeout'])
+            except REDIS_ERRORS as e:
+                self.stderr.write(f"Redis unavailable, retrying: {e}")
+                time.sleep(1)
+                continue
+            if worked:
+                processed += 1
+            elif options['once']:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} translations"))
@@ -0,0 +1,121 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from googletrans import LANGUAGES
+from faqApp.models import (FAQ, FAQTranslation, HTML_FIELDS, TRANSLATABLE_FIELDS,
+                           TranslationMemory, source_hash)
+from faqApp.segments import join_html, split_html
+from faqApp.translation import get_translator
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Fill in missing FAQ translations ahead of time using a pool of workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--langs', required=True,
+                            help="Comma-separated language codes, e.g. hi,bn,fr")
+        parser.add_argument('--workers', type=int, default=8,
+                            help="Number of concurrent translator calls")
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help="Strings sent to the translator per call")
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="FAQs loaded from the database at a time")
+        parser.add_argument('--translator',
+                            help="Dotted path of a translator class, e.g. "
+                                 "faqApp.translation.StubTranslator for offline runs")
+
+    def handle(self, *args, **options):
+        langs = [lang.strip() for lang in options['langs'].split(',')
+                 if lang.strip() and lang.strip() != 'en']
+        unknown = [lang for lang in langs if lang not in LANGUAGES]
+        if unknown:
+            raise CommandError(f"Unsupported language(s): {', '.join(unknown)}")
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be positive")
+
+        translator = get_translator(
+            {'BACKEND': options['translator']} if options['translator'] else None
+        )
+        self.stats = {'translated': 0, 'reused': 0, 'stored': 0, 'skipped': 0, 'failed': 0}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            chunk = []
+            queryset = FAQ.with_translations(FAQ.objects.order_by('id'), langs)
+            for faq in queryset.iterator(chunk_size=options['chunk_size']):
+                chunk.append(faq)
+                if len(chunk) >= options['chunk_size']:
+                    self.warm_chunk(chunk, langs, translator, pool, options['batch_size'])
+                    chunk = []
+            if chunk:
+                self.warm_chunk(chunk, langs, translator, pool, options['batch_size'])
+
+        elapsed = time.monotonic() - started
+        rate = self.stats['translated'] / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Translated {self.stats['translated']} strings in {elapsed:.2f}s "
+            f"({rate:.1f} strings/s); reused {self.stats['reused']} from translation "
+            f"memory; stored {self.stats['stored']} translations, skipped "
+            f"{self.stats['skipped']} already translated, {self.stats['failed']} failed"
+        ))
+
+    def warm_chunk(self, faqs, langs, translator, pool, batch_size):
+        """Translate every missing (faq, field, lang) of one chunk and store the results.
+
+        HTML answers are split into text segments. Texts already in the
+        translation memory, or repeated within the chunk, are not sent again.
+        """
+        by_id = {faq.id: faq for faq in faqs}
+        pending = {}
+        for faq in faqs:
+            missing = faq.missing_translations(langs)
+            self.stats['skipped'] += len(langs) * len(TRANSLATABLE_FIELDS) - len(missing)
+            for field, lang in missing:
+                text = getattr(faq, field)
+                parts, segments = split_html(text) if field in HTML_FIELDS else (None, [text])
+                pending.setdefault(lang, []).append((faq.id, field, text, parts, segments))
+
+        translated = {}
+        futures = {}
+        for lang, items in pending.items():
+            texts = {segment for *_, segments in items for segment in segments}
+            known = TranslationMemory.lookup(texts, lang)
+            translated[lang] = {text: known[source_hash(text)]
+                                for text in texts if source_hash(text) in known}
+            self.stats['reused'] += len(translated[lang])
+            unseen = sorted(texts - set(translated[lang]))
+            for start in range(0, len(unseen), batch_size):
+                batch = unseen[start:start + batch_size]
+                futures[pool.submit(translator.translate_batch, batch, lang)] = (lang, batch)
+
+        for future in as_completed(futures):
+            lang, batch = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.warning("Translation batch to %s failed: %s", lang, e)
+                continue
+            # Texts the translator returned nothing for leave their fields failed
+            results = {text: result for text, result in zip(batch, results) if result}
+            TranslationMemory.remember(lang, results)
+            translated[lang].update(results)
+            self.stats['translated'] += len(results)
+
+        rows = []
+        for lang, items in pending.items():
+            for faq_id, field, text, parts, segments in items:
+                if not all(segment in translated[lang] for segment in segments):
+                    self.stats['failed'] += 1
+                    continue
+                results = [translated[lang][segment] for segment in segments]
+                rows.append(FAQTranslation(
+                    faq=by_id[faq_id], lang=lang, field=field,
+                    text=results[0] if parts is None else join_html(parts, results),
+                    source_hash=source_hash(text),
+                ))
+        self.stats['stored'] += len(rows)
+        if rows:
+            FAQTranslation.upsert(rows)
@@ -0,0 +1,255 @@
+"""Per-request performance instrumentation, exported in the Prometheus text format.
+
+MetricsMiddleware opens a RequestMetrics for every request. Hooks on the
+database connection, the Redis connections, the response cache and the
+translator add to it, and when the response leaves its totals feed this
+worker's histograms, served at /metrics to staff users and to scrapers
+sending FAQ_METRICS_TOKEN as a bearer token. With FAQ_SERVER_TIMING set, the
+totals are also sent back in a Server-Timing header.
+
+Like cache_stats, the aggregates belong to one worker process; scrape each
+worker, or sum them in Prometheus.
+"""
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django_redis.pool import ConnectionFactory
+from redis.asyncio.connection import Connection as AsyncConnection
+from redis.connection import Connection
+
+# What a request can wait on, reported per request even when unused
+SOURCES = ('db', 'redis', 'translator', 'serialize')
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CALL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_current = ContextVar('faq_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Time and calls spent on each source by one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = Counter()
+        self.calls = Counter()
+        self.cache = Counter()
+
+    def server_timing(self, total):
+        entries = [
+            f'{source};dur={self.seconds[source] * 1000:.2f};desc="{self.calls[source]} calls"'
+            for source in SOURCES
+        ]
+        if self.cache:
+            described = ' '.join(f'{key}={count}' for key, count in sorted(self.cache.items()))
+            entries.append(f'cache;desc="{described}"')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def record(source, seconds):
+    """Add one call taking `seconds` to the current request, if there is one."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.seconds[source] += seconds
+        metrics.calls[source] += 1
+
+
+@contextmanager
+def timed(source):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(source, time.perf_counter() - started)
+
+
+def record_cache_lookup(tier, hit):
+    result = 'hit' if hit else 'miss'
+    CACHE_LOOKUPS.inc((tier, result))
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache[f'{tier}_{result}'] += 1
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=('view',)):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self.series.setdefault(
+                labels, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self.series.items()):
+                label_text = _labels(self.labels, labels)
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['buckets']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label_text}}} {series["count"]}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self.series[labels] += amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self.series.items()):
+                lines.append(f'{self.name}{{{_labels(self.labels, labels)}}} {value}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    'faq_request_duration_seconds', "Time to serve a request.", DURATION_BUCKETS)
+SOURCE_SECONDS = Histogram(
+    'faq_request_source_seconds', "Time a request spent on each source.",
+    DURATION_BUCKETS, labels=('view', 'source'))
+SOURCE_CALLS = Histogram(
+    'faq_request_source_calls', "Calls a request made to each source.",
+    CALL_BUCKETS, labels=('view', 'source'))
+CACHE_LOOKUPS = CounterMetric(
+    'faq_cache_lookups_total', "Response cache lookups by tier and result.",
+    labels=('tier', 'result'))
+METRICS = [REQUEST_SECONDS, SOURCE_SECONDS, SOURCE_CALLS, CACHE_LOOKUPS]
+
+
+def expose():
+    return '\n'.join(line for metric in METRICS for line in metric.expose()) + '\n'
+
+
+def may_scrape(request):
+    if request.user.is_staff:
+        return True
+    token = getattr(settings, 'FAQ_METRICS_TOKEN', None)
+    scheme, _, sent = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and secrets.compare_digest(
+        sent.encode(), token.encode())
+
+
+def metrics_view(request):
+    if not may_scrape(request):
+        return HttpResponseForbidden("Metrics are restricted to staff and FAQ_METRICS_TOKEN")
+    return HttpResponse(expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricsMiddleware:
+    """Collect a RequestMetrics per request; works for both sync and async views."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            return self.finish(request, self.get_response(request), metrics)
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            return self.finish(request, await self.get_response(request), metrics)
+        finally:
+            _current.reset(token)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        match = getattr(request, 'resolver_match', None)
+        view = (match and match.view_name) or 'unresolved'
+        REQUEST_SECONDS.observe((view,), total)
+        for source in SOURCES:
+            SOURCE_SECONDS.observe((view, source), metrics.seconds[source])
+            SOURCE_CALLS.observe((view, source), metrics.calls[source])
+        if getattr(settings, 'FAQ_SERVER_TIMING', False):
+            response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+
+def time_queries(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - started)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created receiver timing every query on the new connection."""
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+class InstrumentedConnection(Connection):
+    """Redis connection timing each reply it waits for, one per command."""
+
+    def read_response(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().read_response(*args, **kwargs)
+        finally:
+            record('redis', time.perf_counter() - started)
+
+
+class AsyncInstrumentedConnection(AsyncConnection):
+    async def read_response(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().read_response(*args, **kwargs)
+        finally:
+            record('redis', time.perf_counter() - started)
+
+
+class InstrumentedConnectionFactory(ConnectionFactory):
+    """django-redis connection factory using InstrumentedConnection for redis:// URLs."""
+
+    def make_connection_params(self, url):
+        params = super().make_connection_params(url)
+        if url.startswith('redis://'):
+            params['connection_class'] = InstrumentedConnection
+        return params
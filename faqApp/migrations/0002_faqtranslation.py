@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:11
+
+import hashlib
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_json_to_rows(apps, schema_editor):
+    FAQ = apps.get_model('faqApp', 'FAQ')
+    FAQTranslation = apps.get_model('faqApp', 'FAQTranslation')
+    rows = []
+    for faq_id, question, answer, translations in FAQ.objects.values_list(
+            'id', 'question', 'answer', 'translations').iterator():
+        sources = {'question': question, 'answer': answer}
+        for lang, fields in (translations or {}).items():
+            for field, text in (fields or {}).items():
+                if field in sources and text:
+                    rows.append(FAQTranslation(
+                        faq_id=faq_id, lang=lang, field=field, text=text,
+                        source_hash=hashlib.sha256(sources[field].encode('utf-8')).hexdigest(),
+                    ))
+        if len(rows) >= 1000:
+            FAQTranslation.objects.bulk_create(rows)
+            rows = []
+    FAQTranslation.objects.bulk_create(rows)
+
+
+def copy_rows_to_json(apps, schema_editor):
+    FAQ = apps.get_model('faqApp', 'FAQ')
+    FAQTranslation = apps.get_model('faqApp', 'FAQTranslation')
+    translations = {}
+    for faq_id, lang, field, text in FAQTranslation.objects.values_list(
+            'faq_id', 'lang', 'field', 'text').iterator():
+        translations.setdefault(faq_id, {}).setdefault(lang, {})[field] = text
+    for faq_id, value in translations.items():
+        FAQ.objects.filter(pk=faq_id).update(translations=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FAQTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lang', models.CharField(max_length=10)),
+                ('field', models.CharField(choices=[('question', 'question'), ('answer', 'answer')], max_length=20)),
+                ('text', models.TextField()),
+                ('source_hash', models.CharField(blank=True, help_text='SHA-256 of the English text this translation was made from', max_length=64)),
+                ('faq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='faqApp.faq')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('faq', 'lang', 'field'), name='unique_faq_translation')],
+            },
+        ),
+        migrations.RunPython(copy_json_to_rows, copy_rows_to_json),
+        migrations.RemoveField(
+            model_name='faq',
+            name='translations',
+        ),
+    ]
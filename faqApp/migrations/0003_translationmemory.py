@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+def seed_from_translations(apps, schema_editor):
+    FAQTranslation = apps.get_model('faqApp', 'FAQTranslation')
+    TranslationMemory = apps.get_model('faqApp', 'TranslationMemory')
+    rows = []
+    for hash_, lang, text in FAQTranslation.objects.exclude(source_hash='').values_list(
+            'source_hash', 'lang', 'text').iterator():
+        rows.append(TranslationMemory(source_hash=hash_, lang=lang, text=text))
+        if len(rows) >= 1000:
+            TranslationMemory.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    TranslationMemory.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0002_faqtranslation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('lang', models.CharField(max_length=10)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source_hash', 'lang'), name='unique_translation_memory')],
+            },
+        ),
+        migrations.RunPython(seed_from_translations, migrations.RunPython.noop),
+    ]
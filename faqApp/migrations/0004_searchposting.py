@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0003_translationmemory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('lang', models.CharField(max_length=10)),
+                ('weight', models.FloatField()),
+                ('faq', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='faqApp.faq')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lang', 'term'], name='search_lang_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('faq', 'lang', 'term'), name='unique_search_posting')],
+            },
+        ),
+    ]
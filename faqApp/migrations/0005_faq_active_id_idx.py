@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0004_searchposting'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['is_active', 'id'], name='faq_active_id_idx'),
+        ),
+    ]
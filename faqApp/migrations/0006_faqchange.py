@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:38
+
+from django.db import migrations, models
+
+
+def seed_from_faqs(apps, schema_editor):
+    """Log every existing FAQ once, so a first sync from scratch returns them all."""
+    FAQ = apps.get_model('faqApp', 'FAQ')
+    FAQChange = apps.get_model('faqApp', 'FAQChange')
+    faq_ids = FAQ.objects.order_by('id').values_list('id', flat=True)
+    FAQChange.objects.bulk_create([FAQChange(faq_id=faq_id) for faq_id in faq_ids.iterator()],
+                                  batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0005_faq_active_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FAQChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faq_id', models.IntegerField()),
+                ('lang', models.CharField(blank=True, max_length=10)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lang', 'id'], name='faq_change_lang_idx')],
+            },
+        ),
+        migrations.RunPython(seed_from_faqs, migrations.RunPython.noop),
+    ]
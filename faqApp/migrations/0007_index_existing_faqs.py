@@ -0,0 +1,38 @@
+from django.db import migrations
+from faqApp.search import document_terms
+
+
+def index_existing_faqs(apps, schema_editor):
+    """Build the search postings of FAQs that predate the index, in every language."""
+    FAQ = apps.get_model('faqApp', 'FAQ')
+    FAQTranslation = apps.get_model('faqApp', 'FAQTranslation')
+    SearchPosting = apps.get_model('faqApp', 'SearchPosting')
+    faq_ids = list(FAQ.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(faq_ids), 500):
+        chunk = faq_ids[start:start + 500]
+        documents = {}
+        for faq_id, question, answer in FAQ.objects.filter(id__in=chunk).values_list(
+                'id', 'question', 'answer'):
+            documents[faq_id, 'en'] = {'question': question, 'answer': answer}
+        rows = FAQTranslation.objects.filter(faq_id__in=chunk).values_list(
+            'faq_id', 'lang', 'field', 'text')
+        for faq_id, lang, field, text in rows:
+            documents.setdefault((faq_id, lang), {})[field] = text
+
+        SearchPosting.objects.filter(faq_id__in=chunk).delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(faq_id=faq_id, lang=lang, term=term, weight=weight)
+            for (faq_id, lang), fields in documents.items()
+            for term, weight in document_terms(fields, ('answer',)).items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('faqApp', '0006_faqchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_faqs, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,43 @@
-from django.db import models
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from itertools import chain
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, models, transaction
+from django.utils import timezone
 from django_ckeditor_5.fields import CKEditor5Field
-from googletrans import Translator, LANGUAGES
+from googletrans import LANGUAGES
 from django_redis import get_redis_connection
+from .compression import compress, decompress
+from .cache import (
+    atrack_dependencies, defer_until_recovered, get_async_redis, invalidate_faqs,
+    log_redis_error, track_dependencies,
+)
+from .circuit import REDIS_ERRORS
+from .locks import local_lock, single_flight
+from .metrics import timed
+from .search import document_terms, idf, tokenize
+from .segments import join_html, split_html, translate_html
+from .tasks import get_translation_queue
+from .translation import get_translator
+
+logger = logging.getLogger(__name__)
+
+TRANSLATABLE_FIELDS = ('question', 'answer')
+# How long searches reuse the FAQ count they weigh terms by
+SEARCH_DOCUMENT_COUNT_TTL = 60 * 5
+# Change feed entries older than this may be pruned; older tokens must resync
+DEFAULT_CHANGE_RETENTION_DAYS = 30
+# Fields holding CKEditor HTML, translated one text segment at a time
+HTML_FIELDS = ('answer',)
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 
 class FAQ(models.Model):
     question = models.TextField(
@@ -11,65 +47,270 @@ class FAQ(models.Model):
         help_text="Enter the answer in your primary language (English)",
         config_name='extends'
     )
-    translations = models.JSONField(
-        default=dict,
-        blank=True,
-        help_text="Translations are automatically generated and stored here"
-    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Active-only list pages, walked by id
+            models.Index(fields=['is_active', 'id'], name='faq_active_id_idx'),
+        ]
+
     @staticmethod
     def get_supported_languages():
         return LANGUAGES  # Returns dict of language codes and names from googletrans
 
-    def translate_content(self, text, dest_lang):
+    def translate_content(self, text, dest_lang, html=False):
         if dest_lang not in LANGUAGES:
             return None
         try:
-            translator = Translator()
-            translation = translator.translate(text, dest=dest_lang)
-            return translation.text
+            if html:
+                return translate_html(
+                    text, lambda segments: TranslationMemory.translate(segments, dest_lang))
+            return TranslationMemory.translate([text], dest_lang)[0]
         except Exception as e:
-            print(f"Translation error: {e}")
+            logger.warning("Translating to %s failed: %s", dest_lang, e)
             return None
 
-    def get_translation(self, field, lang='en'):
+    @staticmethod
+    def with_translations(queryset, langs):
+        """Load the stored translations for `langs` with one indexed query per page.
+
+        FAQs loaded this way only see translations in `langs`.
+        """
+        return queryset.prefetch_related(models.Prefetch(
+            'translations',
+            queryset=FAQTranslation.objects.filter(lang__in=langs),
+            to_attr='loaded_translations',
+        ))
+
+    def get_stored_translation(self, field, lang):
+        loaded = getattr(self, 'loaded_translations', None)
+        if loaded is not None:
+            return next((t.text for t in loaded if t.lang == lang and t.field == field), None)
+        return self.load_stored_translation(field, lang)
+
+    def load_stored_translation(self, field, lang):
+        """Read the stored translation from the database, bypassing with_translations()."""
+        return (self.translations.filter(lang=lang, field=field)
+                .values_list('text', flat=True).first())
+
+    def translation_map(self):
+        """Return the stored translations as {lang: {field: text}}."""
+        translations = {}
+        for translation in self.translations.order_by('lang', 'field'):
+            translations.setdefault(translation.lang, {})[translation.field] = translation.text
+        return translations
+
+    def missing_translations(self, langs):
+        """Return the (field, lang) pairs that have no stored translation yet."""
+        langs = [lang for lang in langs if lang != 'en']
+        loaded = getattr(self, 'loaded_translations', None)
+        if loaded is not None:
+            stored = {(t.field, t.lang) for t in loaded}
+        else:
+            stored = set(self.translations.filter(lang__in=langs).values_list('field', 'lang'))
+        return [
+            (field, lang)
+            for lang in langs
+            for field in TRANSLATABLE_FIELDS
+            if (field, lang) not in stored
+        ]
+
+    def store_translation(self, field, lang, text):
+        self.store_translations({lang: {field: text}})
+
+    def store_translations(self, translations):
+        """Upsert {lang: {field: text}} as one row per translation."""
+        FAQTranslation.upsert([
+            FAQTranslation(faq=self, lang=lang, field=field, text=text,
+                           source_hash=source_hash(getattr(self, field)))
+            for lang, fields in translations.items()
+            for field, text in fields.items()
+        ])
+
+    @staticmethod
+    def translation_cache_key(faq_id, field, lang):
+        return f'faq_{faq_id}_{field}_{lang}'
+
+    @classmethod
+    def prefetch_cached_translations(cls, faqs, lang):
+        """Fetch the Redis-cached translations of many FAQs with a single MGET.
+
+        Returns {(faq_id, field): text} for the keys that were present.
+        """
+        return cls.prefetch_cached_bundle(faqs, [lang])[lang]
+
+    @classmethod
+    def prefetch_cached_bundle(cls, faqs, langs):
+        """Like prefetch_cached_translations() for several languages, still in one MGET.
+
+        Returns {lang: {(faq_id, field): text}}.
+        """
+        bundle = {lang: {} for lang in langs}
+        keys = [
+            (faq.id, field, lang)
+            for lang in langs if lang != 'en'
+            for faq in faqs
+            for field in TRANSLATABLE_FIELDS
+        ]
+        if not keys:
+            return bundle
+        redis_client = get_redis_connection("default")
+        try:
+            values = redis_client.mget([cls.translation_cache_key(*key) for key in keys])
+        except REDIS_ERRORS as e:
+            # The stored translations still serve every field
+            log_redis_error("Prefetching cached translations", e)
+            return bundle
+        for (faq_id, field, lang), value in zip(keys, values):
+            if value:
+                bundle[lang][faq_id, field] = decompress(value).decode('utf-8')
+        return bundle
+
+    @classmethod
+    async def aprefetch_cached_translations(cls, faqs, lang):
+        """Like prefetch_cached_translations(), through the asyncio Redis client."""
+        if lang == 'en' or not faqs:
+            return {}
+        pairs = [(faq.id, field) for faq in faqs for field in TRANSLATABLE_FIELDS]
+        try:
+            values = await get_async_redis().mget(
+                [cls.translation_cache_key(*pair, lang) for pair in pairs])
+        except REDIS_ERRORS as e:
+            log_redis_error("Prefetching cached translations", e)
+            return {}
+        return {
+            pair: decompress(value).decode('utf-8')
+            for pair, value in zip(pairs, values) if value
+        }
+
+    @classmethod
+    async def atranslate_missing(cls, faqs, lang, known):
+        """Translate the fields of `faqs` that are neither in `known` nor stored.
+
+        All their texts (answer segments included) go through the translation
+        memory at once, with unseen texts sent in concurrent batches. Results
+        are cached and stored like the blocking path's, and returned as
+        {(faq_id, field): text}. Fields the translator returned nothing for
+        are left out, to stay pending. `faqs` must come from with_translations().
+        """
+        if lang == 'en' or lang not in LANGUAGES:
+            return {}
+        documents = []
+        for faq in faqs:
+            for field in TRANSLATABLE_FIELDS:
+                if (faq.id, field) in known or faq.get_stored_translation(field, lang):
+                    continue
+                text = getattr(faq, field)
+                parts, segments = split_html(text) if field in HTML_FIELDS else (None, [text])
+                documents.append((faq, field, parts, segments))
+        if not documents:
+            return {}
+
+        texts = list(chain.from_iterable(segments for *_, segments in documents))
+        translated = dict(zip(texts, await TranslationMemory.atranslate(texts, lang)))
+        results = {}
+        for faq, field, parts, segments in documents:
+            pieces = [translated[segment] for segment in segments]
+            if not all(pieces):
+                continue
+            results[faq.id, field] = pieces[0] if parts is None else join_html(parts, pieces)
+        if not results:
+            return {}
+
+        pipe = get_async_redis().pipeline(transaction=False)
+        for (faq_id, field), text in results.items():
+            pipe.set(cls.translation_cache_key(faq_id, field, lang), compress(text), ex=3600)
+        try:
+            await pipe.execute()
+        except REDIS_ERRORS as e:
+            log_redis_error("Caching translations", e)
+        else:
+            await asyncio.gather(*[
+                atrack_dependencies(cls.translation_cache_key(faq_id, field, lang), [faq_id],
+                                    raw=True)
+                for faq_id, field in results
+            ])
+        await sync_to_async(FAQTranslation.upsert)([
+            FAQTranslation(faq=faq, lang=lang, field=field, text=results[faq.id, field],
+                           source_hash=source_hash(getattr(faq, field)))
+            for faq, field, _, _ in documents if (faq.id, field) in results
+        ])
+        return results
+
+    def get_redis_translation(self, field, lang):
+        redis_client = get_redis_connection("default")
+        try:
+            cached = redis_client.get(self.translation_cache_key(self.id, field, lang))
+        except REDIS_ERRORS as e:
+            log_redis_error("Reading a cached translation", e)
+            return None
+        return decompress(cached).decode('utf-8') if cached else None
+
+    def get_cached_translation(self, field, lang='en'):
+        """Return an already known translation, or None without calling the translator."""
         if lang == 'en':
             return getattr(self, field)
-        
-        redis_client = get_redis_connection("default")
-        cache_key = f'faq_{self.id}_{field}_{lang}'
-        
+
         # Try Redis first
-        cached = redis_client.get(cache_key)
+        return self.get_redis_translation(field, lang) or self.get_stored_translation(field, lang)
+
+    def get_translation(self, field, lang='en'):
+        cached = self.get_cached_translation(field, lang)
         if cached:
-            return cached.decode('utf-8')
-        
-        # If not in Redis, translate and cache
-        translations = self.translations or {}
-        lang_translations = translations.get(lang, {})
-        
-        if not lang_translations.get(field):
-            try:
-                original = getattr(self, field)
-                translated = self.translate_content(original, lang)
-                if translated:
-                    # Cache in Redis
-                    redis_client.set(cache_key, translated, ex=3600)
-                    
-                    # Update translations field
-                    if lang not in translations:
-                        translations[lang] = {}
-                    translations[lang][field] = translated
-                    self.translations = translations
-                    self.save(update_fields=['translations'])
-                    return translated
-            except Exception as e:
-                print(f"Translation error: {e}")
-        
-        return lang_translations.get(field, getattr(self, field))
+            return cached
+
+        # If not known yet, translate and cache. Concurrent misses for the same
+        # key across workers share a single translator call.
+        redis_client = get_redis_connection("default")
+        cache_key = self.translation_cache_key(self.id, field, lang)
+        translated = None
+        try:
+            translated = single_flight(
+                redis_client,
+                cache_key,
+                fetch=lambda: self.get_redis_translation(field, lang),
+                compute=lambda: self._translate_and_store(field, lang, cache_key),
+            )
+        except REDIS_ERRORS as e:
+            # Without Redis leases, the threads of this process still translate once
+            log_redis_error("Taking the translation lock", e)
+            with local_lock(cache_key):
+                try:
+                    translated = self._translate_and_store(field, lang, cache_key)
+                except DatabaseError as e:
+                    logger.warning("Storing translation %s failed: %s", cache_key, e)
+        except DatabaseError as e:
+            logger.warning("Storing translation %s failed: %s", cache_key, e)
+        if not translated:
+            # The leader may have published before failing, or the wait may have run out
+            translated = (self.get_redis_translation(field, lang)
+                          or self.load_stored_translation(field, lang))
+        return translated or getattr(self, field)
+
+    def _translate_and_store(self, field, lang, cache_key):
+        # An earlier leader may have stored it, then failed before publishing
+        stored = self.load_stored_translation(field, lang)
+        translated = stored or self.translate_content(
+            getattr(self, field), lang, html=field in HTML_FIELDS)
+        if not translated:
+            return None
+
+        # Cache in Redis
+        redis_client = get_redis_connection("default")
+        try:
+            redis_client.set(cache_key, compress(translated), ex=3600)
+        except REDIS_ERRORS as e:
+            log_redis_error("Caching a translation", e)
+        else:
+            track_dependencies(cache_key, [self.id], raw=True)
+
+        # Store as a single-row upsert
+        if not stored:
+            self.store_translation(field, lang, translated)
+        return translated
 
     def get_question(self, lang='en'):
         return self.get_translation('question', lang)
@@ -78,4 +319,363 @@ class FAQ(models.Model):
         return self.get_translation('answer', lang)
 
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        SearchPosting.index([self.id], ['en'])
+        if not adding:
+            self.retranslate_changed_fields()
+        FAQChange.record([self.id])
+
+    def delete(self, *args, **kwargs):
+        faq_id = self.id
+        result = super().delete(*args, **kwargs)
+        SearchPosting.forget_document_count()
+        FAQChange.record([faq_id], deleted=True)
+        return result
+
+    def retranslate_changed_fields(self):
+        """Drop translations made from an older source text and queue them again.
+
+        A stored translation is stale when its source hash no longer matches the
+        field, so editing only the answer leaves the question's translations alone.
+        Returns the (field, lang) pairs queued.
+        """
+        current = models.Q()
+        for field in TRANSLATABLE_FIELDS:
+            current |= models.Q(field=field, source_hash=source_hash(getattr(self, field)))
+        stale = list(self.translations.exclude(current).values_list('id', 'field', 'lang'))
+        if not stale:
+            return []
+
+        FAQTranslation.objects.filter(id__in=[row_id for row_id, _, _ in stale]).delete()
+        SearchPosting.index([self.id], {lang for _, _, lang in stale})
+        cache_keys = [self.translation_cache_key(self.id, field, lang) for _, field, lang in stale]
+        try:
+            get_redis_connection("default").delete(*cache_keys)
+        except REDIS_ERRORS as e:
+            defer_until_recovered("Dropping stale cached translations", e,
+                                  lambda: get_redis_connection("default").delete(*cache_keys))
+        queue = get_translation_queue()
+        for _, field, lang in stale:
+            queue.enqueue(self.id, field, lang)
+        return [(field, lang) for _, field, lang in stale]
+
+
+class FAQTranslation(models.Model):
+    faq = models.ForeignKey(FAQ, on_delete=models.CASCADE, related_name='translations')
+    lang = models.CharField(max_length=10)
+    field = models.CharField(max_length=20, choices=[(f, f) for f in TRANSLATABLE_FIELDS])
+    text = models.TextField()
+    source_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA-256 of the English text this translation was made from"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['faq', 'lang', 'field'], name='unique_faq_translation'),
+        ]
+
+    def __str__(self):
+        return f"{self.faq_id} {self.field} ({self.lang})"
+
+    def save(self, *args, **kwargs):
+        # Translations entered by hand (e.g. in the admin) match the current text
+        if not self.source_hash:
+            self.source_hash = source_hash(getattr(self.faq, self.field))
+        super().save(*args, **kwargs)
+        SearchPosting.index([self.faq_id], [self.lang])
+        FAQChange.record([self.faq_id], lang=self.lang)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        SearchPosting.index([self.faq_id], [self.lang])
+        FAQChange.record([self.faq_id], lang=self.lang)
+        return result
+
+    @classmethod
+    def upsert(cls, rows):
+        """Insert or update rows on (faq, lang, field) in a single statement.
+
+        Cache entries holding the FAQs, such as their translations payload,
+        are evicted once the rows are committed.
+        """
+        rows = cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['faq', 'lang', 'field'],
+            update_fields=['text', 'source_hash'],
+        )
+        faq_ids = sorted({row.faq_id for row in rows})
+        SearchPosting.index(faq_ids, {row.lang for row in rows})
+        for lang in {row.lang for row in rows}:
+            FAQChange.record(sorted({row.faq_id for row in rows if row.lang == lang}), lang=lang)
+        # After commit, so readers can't cache the old rows again
+        transaction.on_commit(lambda: invalidate_faqs(faq_ids))
+        return rows
+
+
+class TranslationMemory(models.Model):
+    """Translations of source texts, shared by every FAQ that contains them."""
+
+    source_hash = models.CharField(max_length=64)
+    lang = models.CharField(max_length=10)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_hash', 'lang'],
+                                    name='unique_translation_memory'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_hash[:12]} ({self.lang})"
+
+    @classmethod
+    def lookup(cls, texts, lang):
+        """Return {source_hash: translation} for the texts already translated to `lang`."""
+        hashes = {source_hash(text) for text in texts}
+        return dict(cls.objects.filter(lang=lang, source_hash__in=hashes)
+                    .values_list('source_hash', 'text'))
+
+    @classmethod
+    async def alookup(cls, texts, lang):
+        """Like lookup(), through the async ORM."""
+        hashes = {source_hash(text) for text in texts}
+        rows = (cls.objects.filter(lang=lang, source_hash__in=hashes)
+                .values_list('source_hash', 'text'))
+        return {hash_: text async for hash_, text in rows}
+
+    @classmethod
+    def memory_rows(cls, lang, translations):
+        return [cls(source_hash=source_hash(text), lang=lang, text=translated)
+                for text, translated in translations.items() if translated]
+
+    @classmethod
+    def remember(cls, lang, translations):
+        """Store {source_text: translation} pairs for `lang`."""
+        cls.objects.bulk_create(cls.memory_rows(lang, translations), ignore_conflicts=True)
+
+    @classmethod
+    def translate(cls, texts, lang, translator=None):
+        """Translate `texts` to `lang`, calling the translator only for unseen texts.
+
+        Duplicates within `texts` are sent once.
+        """
+        known = cls.lookup(texts, lang)
+        unseen = list(dict.fromkeys(text for text in texts if source_hash(text) not in known))
+        if unseen:
+            with timed('translator'):
+                translated = (translator or get_translator()).translate_batch(unseen, lang)
+            new = dict(zip(unseen, translated))
+            try:
+                cls.remember(lang, new)
+            except DatabaseError as e:
+                # The translations are still good; only later reuse is lost
+                logger.warning("Remembering %d translations failed: %s", len(new), e)
+            known.update((source_hash(text), value) for text, value in new.items())
+        return [known.get(source_hash(text)) for text in texts]
+
+    @classmethod
+    async def atranslate(cls, texts, lang, translator=None, batch_size=20):
+        """Like translate(), sending the unseen texts in concurrent batches."""
+        known = await cls.alookup(texts, lang)
+        unseen = list(dict.fromkeys(text for text in texts if source_hash(text) not in known))
+        if unseen:
+            translator = translator or get_translator()
+            batches = [unseen[start:start + batch_size]
+                       for start in range(0, len(unseen), batch_size)]
+            # Recorded as one call: the batches wait concurrently
+            with timed('translator'):
+                translated = await asyncio.gather(
+                    *[translator.atranslate_batch(batch, lang) for batch in batches])
+            new = dict(zip(unseen, chain.from_iterable(translated)))
+            try:
+                await cls.objects.abulk_create(cls.memory_rows(lang, new), ignore_conflicts=True)
+            except DatabaseError as e:
+                logger.warning("Remembering %d translations failed: %s", len(new), e)
+            known.update((source_hash(text), value) for text, value in new.items())
+        return [known.get(source_hash(text)) for text in texts]
+
+
+class SearchPosting(models.Model):
+    """One term of one FAQ in one language, in the inverted search index.
+
+    Maintained on every FAQ and translation write; `weight` already holds
+    the term's saturated, field-boosted frequency.
+    """
+
+    term = models.CharField(max_length=64)
+    lang = models.CharField(max_length=10)
+    faq = models.ForeignKey(FAQ, on_delete=models.CASCADE, related_name='search_postings')
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lang', 'term'], name='search_lang_term_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['faq', 'lang', 'term'], name='unique_search_posting'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.lang}) -> {self.faq_id}"
+
+    @classmethod
+    def index(cls, faq_ids, langs):
+        """Rebuild the postings of `faq_ids` in `langs` from their current text."""
+        faq_ids, langs = list(faq_ids), list(langs)
+        if not faq_ids or not langs:
+            return
+        documents = {}
+        if 'en' in langs:
+            for faq_id, question, answer in FAQ.objects.filter(id__in=faq_ids).values_list(
+                    'id', 'question', 'answer'):
+                documents[faq_id, 'en'] = {'question': question, 'answer': answer}
+        translations = FAQTranslation.objects.filter(faq_id__in=faq_ids, lang__in=langs)
+        rows = translations.values_list('faq_id', 'lang', 'field', 'text')
+        for faq_id, lang, field, text in rows:
+            documents.setdefault((faq_id, lang), {})[field] = text
+
+        cls.objects.filter(faq_id__in=faq_ids, lang__in=langs).delete()
+        cls.objects.bulk_create([
+            cls(faq_id=faq_id, lang=lang, term=term, weight=weight)
+            for (faq_id, lang), fields in documents.items()
+            for term, weight in document_terms(fields, HTML_FIELDS).items()
+        ], batch_size=1000)
+        cls.forget_document_count(langs)
+
+    @classmethod
+    def search(cls, query, lang='en', limit=20):
+        """Return [(faq_id, score)] of the active FAQs best matching `query`, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        postings = cls.objects.filter(lang=lang, term__in=terms)
+        matching = dict(postings.values_list('term').annotate(models.Count('id')))
+        if not matching:
+            return []
+        documents = cls.document_count(lang)
+        score = models.Sum(models.Case(
+            *[models.When(term=term, then=models.F('weight') * idf(documents, count))
+              for term, count in matching.items()],
+            output_field=models.FloatField(),
+        ))
+        results = (postings.filter(faq__is_active=True)
+                   .values('faq_id').annotate(score=score)
+                   .order_by('-score', 'faq_id')[:limit])
+        return [(row['faq_id'], row['score']) for row in results]
+
+    @staticmethod
+    def document_count_key(lang):
+        return f"{settings.CACHE_KEY_PREFIX}search_documents_{lang}"
+
+    @staticmethod
+    def count_documents(lang):
+        if lang == 'en':
+            return FAQ.objects.count()
+        return FAQTranslation.objects.filter(lang=lang).values('faq_id').distinct().count()
+
+    @classmethod
+    def document_count(cls, lang='en'):
+        """FAQs searchable in `lang`, cached so a search does not count them every time."""
+        key = cls.document_count_key(lang)
+        try:
+            documents = cache.get(key)
+        except REDIS_ERRORS as e:
+            log_redis_error("Reading the search document count", e)
+            return cls.count_documents(lang)
+        if documents is None:
+            documents = cls.count_documents(lang)
+            try:
+                cache.set(key, documents, SEARCH_DOCUMENT_COUNT_TTL)
+            except REDIS_ERRORS as e:
+                log_redis_error("Caching the search document count", e)
+        return documents
+
+    @classmethod
+    def forget_document_count(cls, langs=None):
+        """Drop the cached counts of `langs` (default: all) once FAQs are added or deleted."""
+        keys = [cls.document_count_key(lang) for lang in (langs or ['en', *LANGUAGES])]
+        try:
+            cache.delete_many(keys)
+        except REDIS_ERRORS as e:
+            defer_until_recovered("Dropping the search document counts", e,
+                                  lambda: cache.delete_many(keys))
+
+
+class FAQChange(models.Model):
+    """Append-only log of FAQ writes, read by the change feed.
+
+    The id orders the log. A blank `lang` means the FAQ changed in every
+    language, otherwise only its translations into `lang` did. Entries older
+    than FAQ_CHANGE_RETENTION_DAYS are compacted by prune().
+    """
+
+    faq_id = models.IntegerField()
+    lang = models.CharField(max_length=10, blank=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lang', 'id'], name='faq_change_lang_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id}: {self.faq_id} {'deleted' if self.deleted else 'changed'}"
+
+    @classmethod
+    def record(cls, faq_ids, lang='', deleted=False):
+        cls.objects.bulk_create([cls(faq_id=faq_id, lang=lang, deleted=deleted)
+                                 for faq_id in faq_ids])
+
+    @staticmethod
+    def retention_cutoff():
+        days = getattr(settings, 'FAQ_CHANGE_RETENTION_DAYS', DEFAULT_CHANGE_RETENTION_DAYS)
+        return timezone.now() - timedelta(days=days)
+
+    @classmethod
+    def prune(cls, before=None):
+        """Delete entries older than `before` that a full sync does not need.
+
+        The latest FAQ-wide entry of every FAQ that still exists is kept, so a
+        sync from scratch still returns them all. Returns the number deleted.
+        """
+        newer = cls.objects.filter(faq_id=models.OuterRef('faq_id'), lang='',
+                                   id__gt=models.OuterRef('id'))
+        old = cls.objects.filter(created_at__lt=before or cls.retention_cutoff())
+        return old.filter(
+            ~models.Q(lang='') | models.Q(deleted=True) | models.Exists(newer)
+        ).delete()[0]
+
+    @classmethod
+    def since(cls, position, lang, limit, as_of=None):
+        """Read up to `limit` log entries after `position` that concern `lang`.
+
+        `as_of` is a time by which every entry after `position` had been
+        written. prune() only deletes entries older than the retention window,
+        so when `as_of` is older the log is read from the start instead, and
+        the client must replace what it has rather than apply a delta.
+
+        Returns ({faq_id: deleted}, new position, its as_of, whether more
+        entries remain, whether to resync). Later entries for the same FAQ win.
+        """
+        resync = bool(position) and (as_of is None or as_of < cls.retention_cutoff())
+        if resync:
+            position = 0
+        read_at = timezone.now()
+        entries = list(
+            cls.objects.filter(id__gt=position, lang__in=['', lang]).order_by('id')
+            .values_list('id', 'faq_id', 'deleted', 'created_at')[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        changed = {faq_id: deleted for _, faq_id, deleted, _ in entries}
+        if entries:
+            position = entries[-1][0]
+        # Entries left for the next page are no older than the last one read
+        as_of = entries[-1][3] if has_more else read_at
+        return changed, position, as_of, has_more, resync
@@ -0,0 +1,22 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class FAQPagination(CursorPagination):
+    """Keyset pagination on id: every page is one indexed range scan, however deep."""
+
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_cache_token(self, request):
+        """Identify the requested page for cache keys, or None if it can't be cached."""
+        try:
+            cursor = self.decode_cursor(request)
+        except NotFound:
+            return None
+        if cursor is None:
+            page = 'first'
+        else:
+            page = f"{'r' if cursor.reverse else 'f'}{cursor.position}_{cursor.offset}"
+        return f"c{page}_s{self.get_page_size(request)}"
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import json
+import time
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this gain little from gzip
+MIN_COMPRESS_SIZE = 1024
+
+
+def make_etag(body):
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def accepted_encodings(accept_encoding):
+    """Return the content codings of an Accept-Encoding header, less those refused with q=0."""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the request's conditional headers still match."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+class CachedResponse:
+    """A serialized response cached together with its ETag and Last-Modified.
+
+    With `render` set, the JSON body (and gzip and, if brotli is installed,
+    brotli variants when `compress` is set) is stored instead of the data, so
+    cache hits skip the serializer and DRF's renderer. `last_modified` is a
+    Unix timestamp, and so is `fresh_until`, after which the response is still
+    served but due for a rebuild.
+    """
+
+    content_type = 'application/json'
+
+    def __init__(self, data, last_modified=None, render=False, compress=False, fresh_until=None):
+        body = JSONRenderer().render(data)
+        self.fresh_until = fresh_until
+        self.etag = make_etag(body)
+        self.last_modified = int(last_modified) if last_modified is not None else None
+        self.data = None if render else data
+        self.body = body if render else None
+        self.gzip_body = self.br_body = None
+        if render and compress and len(body) >= MIN_COMPRESS_SIZE:
+            self.gzip_body = gzip.compress(body)
+            if brotli is not None:
+                self.br_body = brotli.compress(body, quality=5)
+
+    def is_stale(self):
+        fresh_until = getattr(self, 'fresh_until', None)
+        return fresh_until is not None and time.time() >= fresh_until
+
+    def to_response(self, request):
+        renderer = getattr(request, 'accepted_renderer', None)
+        # Other formats (e.g. the browsable API) still go through DRF's renderers
+        if self.body is not None and (renderer is None or renderer.format == 'json'):
+            return self.to_http_response(request)
+        response = not_modified(request, self.etag, self.last_modified)
+        if response is None:
+            response = Response(self.data if self.body is None else json.loads(self.body))
+        return set_validators(response, self.etag, self.last_modified)
+
+    def pick_encoding(self, accept_encoding):
+        """Return (content coding, body) of the smallest stored variant the client accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        # Entries cached before brotli variants existed have no br_body
+        br_body = getattr(self, 'br_body', None)
+        if br_body is not None and 'br' in accepted:
+            return 'br', br_body
+        if self.gzip_body is not None and 'gzip' in accepted:
+            return 'gzip', self.gzip_body
+        return None, None
+
+    def to_http_response(self, request):
+        """Answer with the JSON bytes, without DRF's renderers (e.g. from async views)."""
+        encoding, encoded = self.pick_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        # A strong ETag identifies one representation, so each encoding gets its own
+        etag = f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+        response = not_modified(request, etag, self.last_modified)
+        if response is None and encoding:
+            response = HttpResponse(encoded, content_type=self.content_type)
+            response['Content-Encoding'] = encoding
+        elif response is None:
+            body = self.body if self.body is not None else JSONRenderer().render(self.data)
+            response = HttpResponse(body, content_type=self.content_type)
+        # A 304 carries them too, so caches keep the right variant (RFC 9110, 15.4.5)
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return set_validators(response, etag, self.last_modified)
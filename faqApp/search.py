@@ -0,0 +1,54 @@
+"""Tokenizing and scoring for the FAQ search index."""
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import cache
+from .segments import html_text
+
+# Combining marks only occur in the first two planes and among the variation selectors
+MARK_RANGES = (range(0x20000), range(0xE0000, 0xE1000))
+
+MAX_TERM_LENGTH = 64
+# Matches in the question count double
+FIELD_WEIGHTS = {'question': 2.0, 'answer': 1.0}
+# BM25 term frequency saturation
+K1 = 1.2
+
+
+@cache
+def token_re():
+    """Built on first use, as it scans the Unicode tables."""
+    # \w alone splits Indic words at their vowel signs, which are combining marks
+    marks = ''.join(
+        chr(code) for codes in MARK_RANGES for code in codes
+        if unicodedata.category(chr(code)) in ('Mn', 'Mc')
+    )
+    return re.compile(f"[\\w{re.escape(marks)}]+")
+
+
+def tokenize(text):
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in token_re().findall(unicodedata.normalize('NFC', text).casefold())
+        if term.strip('_')
+    ]
+
+
+def document_terms(fields, html_fields=()):
+    """Return {term: weight} for one FAQ in one language.
+
+    `fields` maps field names to text; HTML fields are indexed by their text only.
+    """
+    weights = Counter()
+    for field, text in fields.items():
+        if field in html_fields:
+            text = html_text(text)
+        for term, count in Counter(tokenize(text)).items():
+            weights[term] += FIELD_WEIGHTS.get(field, 1.0) * count * (K1 + 1) / (count + K1)
+    return weights
+
+
+def idf(documents, matching):
+    """BM25 inverse document frequency of a term found in `matching` of `documents`."""
+    return math.log(1 + (documents - matching + 0.5) / (matching + 0.5))
@@ -0,0 +1,269 @@
+"""Translate CKEditor HTML one sentence-level segment at a time, leaving the markup intact.
+
+A segment is the text of one block element. Inline markup inside it travels
+with the text as numbered placeholders, so "Open <b>Settings</b> now." goes
+to the translator as "Open <x1>Settings</x1> now." and the translator can
+move the bold words where the target language puts them.
+"""
+import html
+import re
+from html.parser import HTMLParser
+
+# Text inside these elements is kept as written
+SKIP_TAGS = {'code', 'pre', 'script', 'style'}
+
+# Elements that stay inside a segment; every other tag ends it
+INLINE_TAGS = {
+    'a', 'abbr', 'b', 'bdi', 'bdo', 'br', 'cite', 'code', 'data', 'del', 'dfn', 'em',
+    'font', 'i', 'img', 'ins', 'kbd', 'mark', 'q', 's', 'samp', 'small', 'span', 'strong',
+    'sub', 'sup', 'time', 'u', 'var', 'wbr',
+}
+VOID_TAGS = {'br', 'img', 'wbr'}
+
+# Translators may change the case or spacing of a placeholder
+PLACEHOLDER_RE = re.compile(r'<\s*(/?)\s*x(\d+)\s*(/?)\s*>', re.IGNORECASE)
+
+
+class Item:
+    """One piece of a block's inline content: text, a tag, or an element kept whole."""
+
+    def __init__(self, kind, markup, tag=None):
+        self.kind = kind  # 'text', 'start', 'end', 'void' or 'opaque'
+        self.markup = markup
+        self.tag = tag
+        self.pair = None
+
+    @property
+    def is_blank(self):
+        return self.kind == 'text' and not self.markup.strip()
+
+    def as_markup(self):
+        return html.escape(self.markup, quote=False) if self.kind == 'text' else self.markup
+
+
+class Slot:
+    """Where translated segment `index` goes, with the markup its placeholders stand for.
+
+    `tags` maps placeholder numbers to a (start, end) pair or to a single string.
+    """
+
+    def __init__(self, index, tags):
+        self.index = index
+        self.tags = tags
+
+    def render(self, text):
+        out, opened, used, position = [], [], set(), 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            out.append(html.escape(text[position:match.start()], quote=False))
+            position = match.end()
+            closing, number = match.group(1), int(match.group(2))
+            markup = self.tags.get(number)
+            if markup is None or (number in used and number not in opened):
+                continue
+            if not isinstance(markup, tuple):
+                out.append(markup)
+            elif closing:
+                if number in opened:
+                    out.append(markup[1])
+                    opened.remove(number)
+            else:
+                out.append(markup[0])
+                opened.append(number)
+            used.add(number)
+        out.append(html.escape(text[position:], quote=False))
+        # Close what the translation left open, and keep elements it dropped
+        out.extend(self.tags[number][1] for number in reversed(opened))
+        out.extend(markup for number, markup in self.tags.items()
+                   if number not in used and not isinstance(markup, tuple))
+        return ''.join(out)
+
+
+class SegmentSplitter(HTMLParser):
+    """Split HTML into markup strings and Slots for translatable text segments."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.segments = []
+        self._run = []
+        self._open = []
+        self._skip_depth = 0
+        self._opaque = None
+
+    def close(self):
+        super().close()
+        self.flush()
+
+    def handle_starttag(self, tag, attrs):
+        markup = self.get_starttag_text()
+        if self._opaque is not None or self._skip_depth:
+            self.keep(markup)
+            if tag in SKIP_TAGS:
+                self._skip_depth += 1
+        elif tag in SKIP_TAGS and tag in INLINE_TAGS:
+            # Inline code is one placeholder, its text untouched
+            self._opaque = [markup]
+            self._skip_depth = 1
+        elif tag in VOID_TAGS:
+            self._run.append(Item('void', markup, tag))
+        elif tag in INLINE_TAGS:
+            item = Item('start', markup, tag)
+            self._run.append(item)
+            self._open.append(item)
+        else:
+            self.block(markup)
+            if tag in SKIP_TAGS:
+                self._skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        markup = self.get_starttag_text()
+        if self._opaque is not None or self._skip_depth:
+            self.keep(markup)
+        elif tag in INLINE_TAGS:
+            self._run.append(Item('void', markup, tag))
+        else:
+            self.block(markup)
+
+    def handle_endtag(self, tag):
+        markup = f'</{tag}>'
+        if self._opaque is not None or self._skip_depth:
+            if tag in SKIP_TAGS and self._skip_depth:
+                self._skip_depth -= 1
+            self.keep(markup)
+            if self._opaque is not None and not self._skip_depth:
+                self._run.append(Item('opaque', ''.join(self._opaque), tag))
+                self._opaque = None
+        elif tag in INLINE_TAGS:
+            item = Item('end', markup, tag)
+            for start in reversed(self._open):
+                if start.tag == tag:
+                    item.pair = start
+                    start.pair = item
+                    del self._open[self._open.index(start):]
+                    break
+            self._run.append(item)
+        else:
+            self.block(markup)
+
+    def handle_data(self, data):
+        if self.cdata_elem:
+            # Raw script/style content, never unescaped by the parser
+            self.parts.append(data)
+        elif self._opaque is not None or self._skip_depth:
+            self.keep(html.escape(data, quote=False))
+        else:
+            self._run.append(Item('text', data))
+
+    def handle_comment(self, data):
+        self.block(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.block(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self.block(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self.block(f'<![{data}]>')
+
+    def keep(self, markup):
+        """Markup inside an element whose text is kept as written."""
+        if self._opaque is not None:
+            self._opaque.append(markup)
+        else:
+            self.parts.append(markup)
+
+    def block(self, markup):
+        """Markup that ends the current segment."""
+        if self._opaque is not None or self._skip_depth:
+            self.keep(markup)
+            return
+        self.flush()
+        self.parts.append(markup)
+
+    def flush(self):
+        items, self._run, self._open = self._run, [], []
+        if not any(item.kind == 'text' and any(char.isalpha() for char in item.markup)
+                   for item in items):
+            self.parts.extend(item.as_markup() for item in items)
+            return
+
+        # Blanks, line breaks and tags wrapping the whole segment stay in the
+        # markup, so the same sentence is one segment wherever it appears
+        lead, trail = [], []
+        while True:
+            if items[0].is_blank or items[0].kind == 'void':
+                lead.append(items.pop(0).as_markup())
+            elif items[-1].is_blank or items[-1].kind == 'void':
+                trail.insert(0, items.pop().as_markup())
+            elif items[0].kind == 'start' and items[0].pair is items[-1]:
+                lead.append(items.pop(0).markup)
+                trail.insert(0, items.pop().markup)
+            else:
+                break
+        # Surrounding whitespace stays in the markup too
+        if items[0].kind == 'text':
+            text = items[0].markup
+            stripped = text.lstrip()
+            lead.append(html.escape(text[:len(text) - len(stripped)], quote=False))
+            items[0] = Item('text', stripped)
+        if items[-1].kind == 'text':
+            text = items[-1].markup
+            stripped = text.rstrip()
+            trail.insert(0, html.escape(text[len(stripped):], quote=False))
+            items[-1] = Item('text', stripped)
+
+        contained = {id(item) for item in items}
+        numbers, tags, pieces = {}, {}, []
+        for item in items:
+            if item.kind == 'text':
+                pieces.append(item.markup)
+            elif item.kind == 'start' and id(item.pair) in contained:
+                numbers[id(item)] = number = len(tags) + 1
+                tags[number] = (item.markup, item.pair.markup)
+                pieces.append(f'<x{number}>')
+            elif item.kind == 'end' and id(item.pair) in contained:
+                pieces.append(f'</x{numbers[id(item.pair)]}>')
+            else:
+                # Void and kept-whole elements, and tags left unpaired
+                number = len(tags) + 1
+                tags[number] = item.markup
+                pieces.append(f'<x{number}/>')
+
+        self.parts.extend(lead)
+        self.parts.append(Slot(len(self.segments), tags))
+        self.segments.append(''.join(pieces))
+        self.parts.extend(trail)
+
+
+def split_html(markup):
+    """Return (parts, segments).
+
+    `parts` are markup strings, or Slots where a translated segment goes;
+    segments are unescaped text with inline markup as <xN> placeholders and
+    surrounding whitespace removed.
+    """
+    splitter = SegmentSplitter()
+    splitter.feed(markup)
+    splitter.close()
+    return splitter.parts, splitter.segments
+
+
+def join_html(parts, segments):
+    return ''.join(
+        part.render(segments[part.index]) if isinstance(part, Slot) else part
+        for part in parts
+    )
+
+
+def html_text(markup):
+    """The translatable text of `markup`, without tags or placeholders."""
+    return ' '.join(PLACEHOLDER_RE.sub(' ', segment) for segment in split_html(markup)[1])
+
+
+def translate_html(markup, translate):
+    """Translate the text of `markup` with `translate(segments) -> translations`."""
+    parts, segments = split_html(markup)
+    if not segments:
+        return markup
+    return join_html(parts, translate(segments))
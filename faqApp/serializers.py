@@ -1,27 +1,61 @@
 from rest_framework import serializers
-from .models import FAQ
+from .models import FAQ, TRANSLATABLE_FIELDS
+from .tasks import get_translation_queue
 from googletrans import LANGUAGES
 
 class FAQSerializer(serializers.ModelSerializer):
     question = serializers.SerializerMethodField(read_only=True)
     answer = serializers.SerializerMethodField(read_only=True)
     translated_language = serializers.SerializerMethodField(read_only=True)
+    translation_status = serializers.SerializerMethodField(read_only=True)
     question_en = serializers.CharField(write_only=True, source='question')
     answer_en = serializers.CharField(write_only=True, source='answer')
 
     class Meta:
         model = FAQ
-        fields = ['id', 'question', 'answer', 'created_at', 'updated_at', 
-                 'translated_language', 'question_en', 'answer_en', 'is_active']
-        read_only_fields = ['created_at', 'updated_at', 'translated_language']
+        fields = ['id', 'question', 'answer', 'created_at', 'updated_at',
+                  'translated_language', 'translation_status', 'question_en', 'answer_en',
+                  'is_active']
+        read_only_fields = ['created_at', 'updated_at', 'translated_language',
+                            'translation_status']
 
-    def get_question(self, obj):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._resolved = {}
+
+    def resolve_translation(self, obj, field):
+        """Return (text, status) without waiting on the translator.
+
+        Missing translations are queued for the background worker and the
+        English text is served until they are ready.
+        """
         lang = self.context.get('language', 'en')
-        return obj.get_question(lang)
+        key = (obj.pk, field, lang)
+        if key not in self._resolved:
+            # The list view prefetches the Redis keys of a whole page in one call
+            prefetched = self.context.get('prefetched_translations')
+            if prefetched is not None and lang != 'en':
+                text = prefetched.get((obj.pk, field)) or obj.get_stored_translation(field, lang)
+            else:
+                text = obj.get_cached_translation(field, lang)
+            if text:
+                self._resolved[key] = (text, 'ready')
+            else:
+                get_translation_queue().enqueue(obj.pk, field, lang)
+                self._resolved[key] = (getattr(obj, field), 'pending')
+        return self._resolved[key]
+
+    def get_question(self, obj):
+        return self.resolve_translation(obj, 'question')[0]
 
     def get_answer(self, obj):
-        lang = self.context.get('language', 'en')
-        return obj.get_answer(lang)
+        return self.resolve_translation(obj, 'answer')[0]
+
+    def get_translation_status(self, obj):
+        return {
+            field: self.resolve_translation(obj, field)[1]
+            for field in TRANSLATABLE_FIELDS
+        }
     
     def get_translated_language(self, obj):
         lang = self.context.get('language', 'en')
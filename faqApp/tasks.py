@@ -0,0 +1,164 @@
+import json
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from redis import ConnectionPool, Redis
+from .circuit import REDIS_ERRORS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSLATION_QUEUE = {
+    'BACKEND': 'faqApp.tasks.LocalTranslationQueue',
+    'OPTIONS': {},
+}
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def run_translation(faq_id, field, lang):
+    """Translate one FAQ field through the blocking path and store the result."""
+    from .models import FAQ
+
+    faq = FAQ.objects.filter(pk=faq_id).first()
+    if faq is not None:
+        faq.get_translation(field, lang)
+
+
+class LocalTranslationQueue:
+    """In-process stand-in for the Redis queue, worked off by a daemon thread.
+
+    Needs no external services, so it is the default. Pass start_worker=False
+    to leave tasks queued until drain() is called (used by the tests).
+    """
+
+    def __init__(self, start_worker=True):
+        self.start_worker = start_worker
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def enqueue(self, faq_id, field, lang):
+        task = (faq_id, field, lang)
+        with self._lock:
+            if task in self._pending:
+                return False
+            self._pending.add(task)
+        self._queue.put(task)
+        if self.start_worker:
+            self._ensure_worker()
+        return True
+
+    def drain(self):
+        """Run every queued task in the calling thread."""
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._run(task)
+
+    def clear(self):
+        """Drop queued tasks, emptying the queue in place for a running worker."""
+        with self._lock:
+            self._pending.clear()
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    return
+
+    def _run(self, task):
+        try:
+            run_translation(*task)
+        except Exception as e:
+            logger.warning("Background translation %s failed: %s", task, e)
+        finally:
+            with self._lock:
+                self._pending.discard(task)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._work, name='faq-translation-worker', daemon=True
+                )
+                self._worker.start()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            close_old_connections()
+            self._run(task)
+            close_old_connections()
+
+
+class RedisTranslationQueue:
+    """Queue backed by a Redis list, worked off by `manage.py translation_worker`."""
+
+    def __init__(self, key='faq_translation_queue', pending_ttl=300):
+        self.key = key
+        self.pending_ttl = pending_ttl
+        self._blocking_clients = {}
+
+    @property
+    def redis_client(self):
+        return get_redis_connection("default")
+
+    def pending_key(self, faq_id, field, lang):
+        return f'{self.key}_pending_{faq_id}_{field}_{lang}'
+
+    def blocking_client(self, timeout):
+        """A client for BRPOP, whose socket timeout outlasts the `timeout` seconds it blocks.
+
+        The cache's own socket timeout is kept short so a sick Redis fails fast.
+        """
+        if timeout not in self._blocking_clients:
+            pool = self.redis_client.connection_pool
+            kwargs = dict(pool.connection_kwargs, socket_timeout=timeout + 5)
+            self._blocking_clients[timeout] = Redis(connection_pool=ConnectionPool(
+                connection_class=pool.connection_class, **kwargs))
+        return self._blocking_clients[timeout]
+
+    def enqueue(self, faq_id, field, lang):
+        # The pending marker keeps concurrent readers from queuing the same work twice
+        try:
+            if not self.redis_client.set(self.pending_key(faq_id, field, lang), 1,
+                                         nx=True, ex=self.pending_ttl):
+                return False
+            self.redis_client.lpush(self.key, json.dumps([faq_id, field, lang]))
+        except REDIS_ERRORS as e:
+            # Readers keep getting the source text and queue it again later
+            logger.warning("Could not queue translation %s: %s", (faq_id, field, lang), e)
+            return False
+        return True
+
+    def work(self, timeout=5):
+        """Block for up to `timeout` seconds and run one task; return whether one ran."""
+        item = self.blocking_client(timeout).brpop(self.key, timeout=timeout)
+        if not item:
+            return False
+        faq_id, field, lang = json.loads(item[1])
+        try:
+            run_translation(faq_id, field, lang)
+        except Exception as e:
+            logger.warning("Background translation %s failed: %s", (faq_id, field, lang), e)
+        finally:
+            self.redis_client.delete(self.pending_key(faq_id, field, lang))
+        return True
+
+
+def get_translation_queue():
+    """Return the shared queue configured by FAQ_TRANSLATION_QUEUE."""
+    config = getattr(settings, 'FAQ_TRANSLATION_QUEUE', DEFAULT_TRANSLATION_QUEUE)
+    options = config.get('OPTIONS', {})
+    key = (config['BACKEND'], tuple(sorted(options.items())))
+    with _queues_lock:
+        if key not in _queues:
+            _queues[key] = import_string(config['BACKEND'])(**options)
+        return _queues[key]
@@ -1,6 +1,30 @@
 import pytest
 from django.conf import settings
+from django.contrib.auth.models import User
 from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+from faqApp.cache import get_response_cache
+from faqApp.models import FAQ
+from faqApp.tasks import get_translation_queue
+
+
+@pytest.fixture
+def api_client():
+    """A client authenticated as a regular user, allowed to write."""
+    user = User.objects.create_user(username='testuser', password='testpass')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def faq():
+    """One FAQ with a stored French translation."""
+    faq = FAQ.objects.create(question="Test Question?", answer="<p>Test Answer</p>")
+    faq.store_translations(
+        {'fr': {'question': 'Question de test?', 'answer': '<p>Réponse de test</p>'}})
+    return faq
+
 
 @pytest.fixture(autouse=True)
 def use_redis_for_testing(settings):
@@ -14,6 +38,21 @@ def use_redis_for_testing(settings):
         }
     }
     settings.CACHE_KEY_PREFIX = "test_"
+    settings.FAQ_TRANSLATOR = {
+        'BACKEND': 'faqApp.translation.StubTranslator',
+        'OPTIONS': {},
+    }
+    settings.FAQ_TRANSLATION_QUEUE = {
+        'BACKEND': 'faqApp.tasks.LocalTranslationQueue',
+        'OPTIONS': {'start_worker': False},
+    }
+    settings.FAQ_LOCAL_CACHE = {
+        'MAX_ENTRIES': 1024,
+        'TIMEOUT': 30,
+        'INVALIDATION_BUS': 'faqApp.cache.LocalInvalidationBus',
+    }
+    get_translation_queue().clear()
+    get_response_cache().clear()
     
     # Clear Redis before each test
     redis_client = get_redis_connection("default")
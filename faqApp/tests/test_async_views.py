@@ -0,0 +1,155 @@
+import asyncio
+import time
+from unittest import mock
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp import async_views
+from faqApp.cache import revalidate
+from faqApp.models import FAQ, TranslationMemory
+from faqApp.tasks import get_translation_queue
+from faqApp.translation import get_translator
+
+
+def async_get(url, **kwargs):
+    return async_to_sync(AsyncClient().get)(url, **kwargs)
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    def test_list_matches_blocking_view(self, faq):
+        response = async_get(reverse('faq-async-list'), data={'lang': 'fr'})
+        assert response.status_code == 200
+        expected = APIClient().get(reverse('faq-list'), {'lang': 'fr'})
+        assert response.json() == expected.json()
+        assert response['ETag'] == expected['ETag']
+
+    def test_list_translates_missing_fields_in_one_batch(self, faq):
+        calls_before = get_translator().calls
+        response = async_get(reverse('faq-async-list'), data={'lang': 'hi'})
+        result = response.json()['results'][0]
+        assert result['question'] == '[hi] Test Question?'
+        assert result['answer'] == '<p>[hi] Test Answer</p>'
+        assert result['translation_status'] == {'question': 'ready', 'answer': 'ready'}
+        assert get_translator().calls - calls_before == 1
+        assert faq.get_stored_translation('answer', 'hi') == '<p>[hi] Test Answer</p>'
+        assert faq.get_redis_translation('question', 'hi') == '[hi] Test Question?'
+
+    def test_empty_translations_stay_pending(self, faq, monkeypatch):
+        async def drop_questions(texts, dest):
+            return [None if text == faq.question else f'[{dest}] {text}' for text in texts]
+
+        monkeypatch.setattr(get_translator(), 'atranslate_batch', drop_questions)
+        response = async_get(reverse('faq-async-detail', args=[faq.id]), data={'lang': 'hi'})
+        assert response.json()['translation_status'] == {'question': 'pending', 'answer': 'ready'}
+        assert faq.get_stored_translation('question', 'hi') is None
+        assert faq.get_redis_translation('question', 'hi') is None
+        assert faq.get_stored_translation('answer', 'hi') == '<p>[hi] Test Answer</p>'
+
+    def test_failed_memory_write_still_answers(self, faq, monkeypatch):
+        async def fail(*args, **kwargs):
+            raise DatabaseError("disk full")
+
+        monkeypatch.setattr(TranslationMemory.objects, 'abulk_create', fail)
+        response = async_get(reverse('faq-async-detail', args=[faq.id]), data={'lang': 'hi'})
+        assert response.status_code == 200
+        assert response.json()['question'] == '[hi] Test Question?'
+
+    def test_concurrent_misses_build_once(self, faq):
+        serialize_bundle = async_views.serialize_bundle
+        builds = []
+
+        async def slow_serialize_bundle(*args):
+            builds.append(args)
+            await asyncio.sleep(0.2)
+            return await serialize_bundle(*args)
+
+        client = AsyncClient()
+
+        async def fetch_all():
+            return await asyncio.gather(*[
+                client.get(reverse('faq-async-list'), {'lang': 'fr'}) for _ in range(10)])
+
+        with mock.patch.object(async_views, 'serialize_bundle', slow_serialize_bundle):
+            responses = async_to_sync(fetch_all)()
+        assert len(builds) == 1
+        assert all(response.json() == responses[0].json() for response in responses)
+
+    def test_slow_translations_fall_back_to_the_queue(self, faq, settings):
+        settings.FAQ_TRANSLATOR = {'BACKEND': 'faqApp.translation.StubTranslator',
+                                   'OPTIONS': {'latency': 0.5}}
+        settings.FAQ_ASYNC_TRANSLATION_TIMEOUT = 0.05
+        response = async_get(reverse('faq-async-detail', args=[faq.id]), data={'lang': 'bn'})
+        assert response.json()['translation_status'] == {'question': 'pending', 'answer': 'pending'}
+        assert 'ETag' not in response
+        get_translation_queue().drain()
+        assert faq.get_stored_translation('question', 'bn') == '[bn] Test Question?'
+
+    def test_detail_and_conditional_get(self, faq):
+        url = reverse('faq-async-detail', args=[faq.id])
+        response = async_get(url, data={'lang': 'fr'})
+        assert response.json()['question'] == 'Question de test?'
+        assert async_get(url, data={'lang': 'fr'},
+                         headers={'If-None-Match': response['ETag']}).status_code == 304
+        assert async_get(reverse('faq-async-detail', args=[12345])).status_code == 404
+
+    def test_translations_match_blocking_view(self, faq):
+        response = async_get(reverse('faq-async-translations', args=[faq.id]))
+        assert response.json()['translations']['fr']['question'] == 'Question de test?'
+        expected = APIClient().get(reverse('faq-translations', args=[faq.id]))
+        assert response['ETag'] == expected['ETag']
+
+    def test_language_bundle_matches_blocking_view(self, faq):
+        response = async_get(reverse('faq-async-list'), data={'lang': 'fr,hi'})
+        results = response.json()['results']
+        assert results['hi'][0]['question'] == '[hi] Test Question?'
+        expected = APIClient().get(reverse('faq-list'), {'lang': 'fr,hi'})
+        assert response.json() == expected.json()
+        detail = async_get(reverse('faq-async-detail', args=[faq.id]), data={'lang': 'fr,en'})
+        assert detail.json()['fr']['question'] == 'Question de test?'
+
+    def test_invalid_cursor(self, faq):
+        assert async_get(reverse('faq-async-list'), data={'cursor': 'abc'}).status_code == 404
+
+    def test_concurrent_misses_wait_together(self, settings):
+        settings.FAQ_TRANSLATOR = {'BACKEND': 'faqApp.translation.StubTranslator',
+                                   'OPTIONS': {'latency': 0.3}}
+        faqs = [FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+                for i in range(10)]
+        client = AsyncClient()
+
+        async def fetch_all():
+            return await asyncio.gather(*[
+                client.get(reverse('faq-async-detail', args=[faq.id]), {'lang': 'hi'})
+                for faq in faqs
+            ])
+
+        started = time.monotonic()
+        responses = async_to_sync(fetch_all)()
+        assert time.monotonic() - started < 10 * 0.3
+        questions = [response.json()['question'] for response in responses]
+        assert questions == [f'[hi] Question {i}?' for i in range(10)]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncStaleWhileRevalidate:
+    def test_stale_entry_is_served_then_refreshed(self, settings):
+        settings.FAQ_CACHE_SOFT_TTL = 0
+        threads = []
+
+        def tracked_revalidate(*args, **kwargs):
+            threads.append(revalidate(*args, **kwargs))
+            return threads[-1]
+
+        faq = FAQ.objects.create(question="Old question?", answer="Answer")
+        url = reverse('faq-async-detail', args=[faq.id])
+        with mock.patch.object(async_views, 'revalidate', tracked_revalidate):
+            assert async_get(url).json()['question'] == "Old question?"
+            # A write that skips invalidation, so only the refresh can pick it up
+            FAQ.objects.filter(pk=faq.pk).update(question="New question?")
+            assert async_get(url).json()['question'] == "Old question?"
+            threads[0].join(timeout=5)
+            assert async_get(url).json()['question'] == "New question?"
@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+from django.conf import settings
+from faqApp.benchmarks.support import compare_results, latency_stats
+
+
+class TestBenchmarkSupport:
+    def test_latency_stats(self):
+        stats = latency_stats([0.001 * i for i in range(1, 101)])
+        assert stats['p50_ms'] == 50.0
+        assert stats['p95_ms'] == 95.0
+        assert stats['p99_ms'] == 99.0
+        assert stats['mean_ms'] == 50.5
+
+    def test_regressions_follow_the_metric_direction(self):
+        previous = {'100': {'list': {'warm': {'p95_ms': 2.0, 'requests_per_second': 500}}}}
+        results = {'100': {'list': {'warm': {'p95_ms': 1.0, 'requests_per_second': 400}}}}
+        regressed = {path: flag for path, *_, flag in compare_results(previous, results, 0.1)}
+        assert regressed == {'100.list.warm.p95_ms': False,
+                             '100.list.warm.requests_per_second': True}
+
+
+class TestBenchmarkCommand:
+    def test_tiny_api_run(self, tmp_path):
+        baseline, output = tmp_path / 'baseline.json', tmp_path / 'results.json'
+        baseline.write_text(json.dumps({'benchmark': 'api', 'results': {}}))
+        # In a child process, as the command creates and drops its own test database
+        run = subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark', 'api', '--fake-redis', '--sizes', '5',
+             '--langs', 'hi', '--lang-counts', '1', '--requests', '1',
+             '--translator-latency', '0', '--output', str(output), '--compare', str(baseline)],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+        )
+        assert run.returncode == 0, run.stderr
+        assert 'retrieve_async untranslated' in run.stdout
+        assert '0 regressions' in run.stdout
+        assert json.loads(output.read_text())['benchmark'] == 'api'
@@ -0,0 +1,121 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from faqApp.models import FAQ, FAQChange
+from faqApp.tasks import get_translation_queue
+from faqApp.views import parse_since_token, since_token
+
+
+def sync(since=None, **params):
+    if since:
+        params['since'] = since
+    return APIClient().get(reverse('faq-changes'), params).json()
+
+
+def age_log(days):
+    FAQChange.objects.update(created_at=timezone.now() - timedelta(days=days))
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    def test_first_sync_returns_everything(self):
+        faqs = [FAQ.objects.create(question=f"Question {i}?", answer="Answer") for i in range(3)]
+        data = sync()
+        assert [item['id'] for item in data['changes']] == [faq.id for faq in faqs]
+        assert data['deleted'] == []
+        assert data['has_more'] is False
+
+    def test_only_changes_since_the_token(self):
+        first = FAQ.objects.create(question="First?", answer="Answer")
+        second = FAQ.objects.create(question="Second?", answer="Answer")
+        since = sync()['since']
+        second.question = "Second, edited?"
+        second.save()
+        data = sync(since)
+        assert [item['question'] for item in data['changes']] == ["Second, edited?"]
+        assert first.id not in data['deleted']
+        assert sync(data['since'])['changes'] == []
+
+    def test_deletions_and_deactivations_are_tombstones(self):
+        deleted = FAQ.objects.create(question="Deleted?", answer="Answer")
+        hidden = FAQ.objects.create(question="Hidden?", answer="Answer")
+        since = sync()['since']
+        deleted_id = deleted.id
+        deleted.delete()
+        hidden.is_active = False
+        hidden.save()
+        data = sync(since)
+        assert data['changes'] == []
+        assert data['deleted'] == sorted([deleted_id, hidden.id])
+
+    def test_translations_are_changes_in_their_language_only(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        since = sync()['since']
+        faq.store_translations({'hi': {'question': 'प्रश्न?'}})
+        assert [item['question'] for item in sync(since, lang='hi')['changes']] == ['प्रश्न?']
+        assert sync(since, lang='fr')['changes'] == []
+
+    def test_pages_with_has_more(self):
+        faqs = [FAQ.objects.create(question=f"Question {i}?", answer="Answer") for i in range(3)]
+        data = sync(limit=2)
+        assert data['has_more'] is True
+        rest = sync(data['since'], limit=2)
+        synced = data['changes'] + rest['changes']
+        assert [item['id'] for item in synced] == [faq.id for faq in faqs]
+        assert rest['has_more'] is False
+
+    def test_no_changes_costs_one_query(self, django_assert_num_queries):
+        FAQ.objects.create(question="Question?", answer="Answer")
+        since = sync()['since']
+        with django_assert_num_queries(1):
+            assert sync(since, lang='hi')['changes'] == []
+
+    def test_invalid_token(self):
+        for since in ('!!', '1.zzzzzzzzzzzz', '1.1111111111111'):
+            response = APIClient().get(reverse('faq-changes'), {'since': since})
+            assert response.status_code == 400
+
+    def test_unsupported_language(self):
+        FAQ.objects.create(question="Question?", answer="Answer")
+        response = APIClient().get(reverse('faq-changes'), {'lang': 'zz'})
+        assert response.status_code == 400
+        assert get_translation_queue()._queue.empty()
+
+    def test_log_is_append_only(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        faq.save()
+        assert FAQChange.objects.filter(faq_id=faq.id).count() == 2
+
+
+@pytest.mark.django_db
+class TestChangeRetention:
+    def test_prune_keeps_what_a_full_sync_needs(self, settings):
+        settings.FAQ_CHANGE_RETENTION_DAYS = 30
+        kept = FAQ.objects.create(question="Kept?", answer="Answer")
+        kept.save()
+        kept.store_translations({'hi': {'question': 'प्रश्न?'}})
+        FAQ.objects.create(question="Deleted?", answer="Answer").delete()
+        age_log(31)
+        recent = FAQ.objects.create(question="Recent?", answer="Answer")
+        out = StringIO()
+        call_command('prune_faq_changes', stdout=out)
+        assert "Pruned 4 change feed entries" in out.getvalue()
+        assert sorted(FAQChange.objects.values_list('faq_id', flat=True)) == [kept.id, recent.id]
+        assert [item['id'] for item in sync()['changes']] == [kept.id, recent.id]
+
+    def test_expired_token_resyncs_from_scratch(self, settings):
+        settings.FAQ_CHANGE_RETENTION_DAYS = 30
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        position, _ = parse_since_token(sync()['since'])
+        age_log(31)
+        FAQChange.prune()
+        # Long unchanged FAQs keep old entries, which recent tokens still point at
+        assert sync(since_token(position, timezone.now()))['resync'] is False
+        data = sync(since_token(position, timezone.now() - timedelta(days=31)))
+        assert data['resync'] is True
+        assert [item['id'] for item in data['changes']] == [faq.id]
+        assert sync(data['since'])['resync'] is False
@@ -0,0 +1,131 @@
+import threading
+import time
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from redis.exceptions import ConnectionError
+from rest_framework.test import APIClient
+from faqApp import cache as faq_cache
+from faqApp.cache import get_response_cache, replay_deferred_writes
+from faqApp.circuit import CircuitBreaker, RedisUnavailable, breaker
+
+# Nothing listens on port 1, so connections are refused at once
+UNREACHABLE_REDIS = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/1",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "REDIS_CLIENT_CLASS": "faqApp.circuit.BreakerRedis",
+            "ASYNC_REDIS_CLIENT_CLASS": "faqApp.circuit.AsyncBreakerRedis",
+            "IGNORE_EXCEPTIONS": True,
+        }
+    }
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_breaker(settings):
+    settings.FAQ_REDIS_CIRCUIT_BREAKER = {'FAILURE_THRESHOLD': 2, 'RESET_TIMEOUT': 0.2}
+    breaker.reset()
+    faq_cache._deferred_writes.clear()
+    yield
+    breaker.reset()
+    faq_cache._deferred_writes.clear()
+
+
+def fail(circuit):
+    with pytest.raises(ConnectionError):
+        with circuit.guard():
+            raise ConnectionError("refused")
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        circuit = CircuitBreaker()
+        fail(circuit)
+        with circuit.guard():
+            pass
+        fail(circuit)
+        assert circuit.state == 'closed'
+        fail(circuit)
+        assert circuit.state == 'open'
+        with pytest.raises(RedisUnavailable):
+            with circuit.guard():
+                pytest.fail("Redis was called while the circuit is open")
+
+    def test_one_trial_closes_it_again(self):
+        circuit = CircuitBreaker()
+        recovered = []
+        circuit.on_recover(lambda: recovered.append(True))
+        fail(circuit)
+        fail(circuit)
+        time.sleep(0.25)
+
+        trial_started, finish_trial = threading.Event(), threading.Event()
+
+        def trial():
+            with circuit.guard():
+                trial_started.set()
+                finish_trial.wait(1)
+
+        thread = threading.Thread(target=trial)
+        thread.start()
+        trial_started.wait(1)
+        # Only the trial goes through while the circuit is half-open
+        with pytest.raises(RedisUnavailable):
+            circuit.before_call()
+        finish_trial.set()
+        thread.join()
+        assert circuit.state == 'closed'
+        assert recovered == [True]
+
+    def test_failed_trial_reopens_it(self):
+        circuit = CircuitBreaker()
+        fail(circuit)
+        fail(circuit)
+        time.sleep(0.25)
+        fail(circuit)
+        assert circuit.state == 'open'
+        with pytest.raises(RedisUnavailable):
+            circuit.before_call()
+
+
+@pytest.mark.django_db
+class TestRedisDown:
+    def test_serves_from_the_local_cache(self, faq, settings, django_assert_num_queries):
+        settings.CACHES = UNREACHABLE_REDIS
+        client = APIClient()
+        url = reverse('faq-list')
+
+        response = client.get(url, {'lang': 'fr'})
+        assert response.status_code == 200
+        assert response.data['results'][0]['question'] == 'Question de test?'
+        assert breaker.state == 'open'
+
+        with django_assert_num_queries(0):
+            cached = client.get(url, {'lang': 'fr'})
+        assert cached.data == response.data
+        assert client.get(reverse('faq-translations', args=[faq.id])).status_code == 200
+        detail = async_to_sync(AsyncClient().get)(reverse('faq-async-detail', args=[faq.id]),
+                                                  {'lang': 'fr'})
+        assert detail.json()['question'] == 'Question de test?'
+
+    def test_writes_while_down_are_replayed_on_recovery(self, faq, api_client, settings):
+        url = reverse('faq-detail', args=[faq.id])
+        api_client.get(url)
+        live_redis = settings.CACHES
+
+        settings.CACHES = UNREACHABLE_REDIS
+        response = api_client.patch(url, {'question_en': 'Changed?'}, format='json')
+        assert response.status_code == 200
+        assert api_client.get(url).data['question'] == 'Changed?'
+
+        settings.CACHES = live_redis
+        get_response_cache().clear()
+        # The entry cached before the outage was never evicted from Redis
+        assert api_client.get(url).data['question'] == 'Test Question?'
+        replay_deferred_writes()
+        get_response_cache().clear()
+        assert api_client.get(url).data['question'] == 'Changed?'
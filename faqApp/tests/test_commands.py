@@ -0,0 +1,138 @@
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp.cache import get_generation
+from faqApp.models import FAQ, FAQTranslation, SearchPosting, TranslationMemory
+from faqApp.translation import get_translator
+
+
+@pytest.mark.django_db
+class TestWarmTranslations:
+    def test_fills_missing_translations(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        out = StringIO()
+        call_command('warm_translations', langs='hi,fr', workers=2, batch_size=1, stdout=out)
+        translations = faq.translation_map()
+        assert translations['hi'] == {'question': '[hi] Question?', 'answer': '[hi] Answer'}
+        assert translations['fr']['answer'] == '[fr] Answer'
+        assert "Translated 4 strings" in out.getvalue()
+
+    def test_skips_existing_translations(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        faq.store_translation('question', 'fr', 'Question de test?')
+        out = StringIO()
+        call_command('warm_translations', langs='fr', stdout=out)
+        assert faq.translation_map()['fr'] == {'question': 'Question de test?',
+                                               'answer': '[fr] Answer'}
+        assert "skipped 1 already translated" in out.getvalue()
+
+    def test_reuses_translation_memory_for_repeated_texts(self):
+        FAQ.objects.create(question="Same question?", answer="First")
+        FAQ.objects.create(question="Same question?", answer="Second")
+        TranslationMemory.remember('fr', {'First': 'Premier'})
+        out = StringIO()
+        call_command('warm_translations', langs='fr', stdout=out)
+        assert "Translated 2 strings" in out.getvalue()
+        assert "reused 1 from translation memory" in out.getvalue()
+        assert TranslationMemory.lookup(["Same question?"], 'fr')
+
+    def test_empty_results_count_as_failed(self, monkeypatch):
+        faq = FAQ.objects.create(question="Question?", answer="<p>Answer</p>")
+        translator = get_translator()
+        monkeypatch.setattr(translator, 'translate_batch', lambda texts, dest: [
+            None if text == 'Answer' else f'[{dest}] {text}' for text in texts])
+        out = StringIO()
+        call_command('warm_translations', langs='hi', stdout=out)
+        assert faq.translation_map() == {'hi': {'question': '[hi] Question?'}}
+        assert "stored 1 translations" in out.getvalue()
+        assert "1 failed" in out.getvalue()
+        assert not TranslationMemory.objects.filter(text__isnull=True).exists()
+
+    def test_rejects_unknown_language(self):
+        with pytest.raises(CommandError):
+            call_command('warm_translations', langs='xx')
+
+
+@pytest.mark.django_db
+class TestImportExport:
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_faqs', stdout=out, stderr=StringIO(), **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_export_writes_one_faq_per_line(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        faq.store_translations({'hi': {'question': 'प्रश्न?'}, 'fr': {'answer': 'Réponse'}})
+        FAQ.objects.create(question="Hidden?", answer="Answer", is_active=False)
+        assert self.export(active_only=True, langs='hi') == [{
+            'id': faq.id, 'question': "Question?", 'answer': "Answer", 'is_active': True,
+            'translations': {'hi': {'question': 'प्रश्न?'}},
+        }]
+
+    def test_round_trip(self, tmp_path):
+        for i in range(5):
+            faq = FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+            faq.store_translations({'fr': {'question': f'Question {i} ?'}})
+        exported = self.export()
+        path = tmp_path / 'faqs.ndjson'
+        path.write_text(''.join(json.dumps(item) + '\n' for item in exported), encoding='utf-8')
+        FAQ.objects.all().delete()
+
+        out = StringIO()
+        call_command('import_faqs', str(path), batch_size=2, stdout=out)
+        assert "Created 5" in out.getvalue()
+        assert self.export() == exported
+        assert SearchPosting.search("question", lang='fr')
+
+    def test_import_updates_and_invalidates_once(self, tmp_path):
+        faq = FAQ.objects.create(question="Old question?", answer="Answer")
+        faq.store_translations({'fr': {'question': 'Ancienne question ?', 'answer': 'Réponse'}})
+        api_client = APIClient()
+        url = reverse('faq-detail', args=[faq.id])
+        assert api_client.get(url, {'lang': 'fr'}).data['question'] == 'Ancienne question ?'
+        generation = get_generation('list')
+
+        path = tmp_path / 'faqs.ndjson'
+        path.write_text('\n'.join([
+            json.dumps({'id': faq.id, 'question': "New question?", 'answer': "Answer"}),
+            json.dumps({'question': "Another?", 'answer': "Yes",
+                        'translations': {'hi': {'answer': 'हाँ'}}}),
+        ]), encoding='utf-8')
+        out = StringIO()
+        call_command('import_faqs', str(path), stdout=out)
+
+        assert "Created 1, updated 1" in out.getvalue()
+        assert get_generation('list') > generation
+        # The question's translation was made from the old text, the answer's still holds
+        assert faq.translation_map() == {'fr': {'answer': 'Réponse'}}
+        assert api_client.get(url, {'lang': 'fr'}).data['answer'] == 'Réponse'
+        assert FAQTranslation.objects.get(lang='hi').text == 'हाँ'
+
+    def test_imported_translation_corrections_are_served(
+            self, tmp_path, django_capture_on_commit_callbacks):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        faq.store_translations({'fr': {'question': 'Question fausse ?'}})
+        assert faq.get_translation('question', 'fr') == 'Question fausse ?'
+        url = reverse('faq-translations', args=[faq.id])
+        APIClient().get(url)
+
+        path = tmp_path / 'faqs.ndjson'
+        path.write_text(json.dumps({
+            'id': faq.id, 'question': "Question?", 'answer': "Answer",
+            'translations': {'fr': {'question': 'Question ?'}},
+        }), encoding='utf-8')
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('import_faqs', str(path), stdout=StringIO())
+
+        assert FAQ.objects.get(id=faq.id).get_translation('question', 'fr') == 'Question ?'
+        assert APIClient().get(url).data['translations']['fr']['question'] == 'Question ?'
+
+    def test_import_reports_the_bad_line(self, tmp_path):
+        path = tmp_path / 'faqs.ndjson'
+        path.write_text('{"question": "Q?", "answer": "A"}\n{"question": 1}\n', encoding='utf-8')
+        with pytest.raises(CommandError, match="Line 2"):
+            call_command('import_faqs', str(path), stdout=StringIO())
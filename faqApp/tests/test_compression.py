@@ -0,0 +1,98 @@
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+from faqApp.compression import compress, decompress
+from faqApp.models import FAQ
+from faqApp.responses import CachedResponse
+
+LONG_ANSWER = '<p>' + 'Rich text answer with <strong>markup</strong>. ' * 100 + '</p>'
+
+
+class TestCompression:
+    def test_round_trip_above_threshold(self, settings):
+        settings.FAQ_CACHE_COMPRESS_MIN_LENGTH = 64
+        compressed = compress(LONG_ANSWER)
+        assert compressed[:1] == b'\x00'
+        assert len(compressed) < len(LONG_ANSWER) / 10
+        assert decompress(compressed).decode('utf-8') == LONG_ANSWER
+
+    def test_short_and_legacy_values_are_left_alone(self, settings):
+        settings.FAQ_CACHE_COMPRESS_MIN_LENGTH = 64
+        assert compress('Short text') == 'Short text'
+        legacy = b'{"stored": "before compression"}'
+        assert decompress(legacy) == legacy
+
+    def test_brotli_variant_is_preferred(self):
+        payload = CachedResponse({'answer': LONG_ANSWER}, render=True, compress=True)
+        payload.br_body = b'brotli body'
+        assert payload.pick_encoding('gzip, deflate, br') == ('br', b'brotli body')
+        assert payload.pick_encoding('gzip')[0] == 'gzip'
+        assert payload.pick_encoding('identity') == (None, None)
+
+    def test_refused_encodings_are_not_picked(self):
+        payload = CachedResponse({'answer': LONG_ANSWER}, render=True, compress=True)
+        payload.br_body = b'brotli body'
+        assert payload.pick_encoding('br;q=0, gzip')[0] == 'gzip'
+        assert payload.pick_encoding('br; q=0.5, gzip;q=0') == ('br', b'brotli body')
+        assert payload.pick_encoding('gzip;q=0.0') == (None, None)
+
+    def test_brotli_response(self):
+        brotli = pytest.importorskip('brotli')
+        payload = CachedResponse({'answer': LONG_ANSWER}, render=True, compress=True)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        response = payload.to_http_response(request)
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.content) == payload.body
+
+    def test_not_modified_keeps_etag_and_vary(self):
+        payload = CachedResponse({'answer': LONG_ANSWER}, render=True, compress=True)
+        etag = payload.to_http_response(
+            RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))['ETag']
+        response = payload.to_http_response(RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert response['Vary'] == 'Accept, Accept-Encoding'
+
+
+@pytest.mark.django_db
+class TestCompressedCache:
+    @pytest.fixture
+    def faq(self):
+        faq = FAQ.objects.create(question="Long question?", answer=LONG_ANSWER)
+        faq.store_translations({'fr': {'question': 'Longue question ?', 'answer': LONG_ANSWER}})
+        return faq
+
+    def test_translation_keys_are_stored_compressed(self, faq, settings):
+        settings.FAQ_CACHE_COMPRESS_MIN_LENGTH = 64
+        translated = faq.get_translation('answer', 'hi')
+        assert translated.startswith('<p>[hi] ')
+        raw = get_redis_connection("default").get(FAQ.translation_cache_key(faq.id, 'answer', 'hi'))
+        assert raw[:1] == b'\x00'
+        assert faq.get_redis_translation('answer', 'hi') == translated
+
+    def test_translations_endpoint_reads_compressed_payload(self, faq, settings):
+        settings.FAQ_CACHE_COMPRESS_MIN_LENGTH = 64
+        url = reverse('faq-translations', args=[faq.id])
+        first = APIClient().get(url)
+        assert get_redis_connection("default").get(f'faq_translations_{faq.id}')[:1] == b'\x00'
+        second = APIClient().get(url)
+        assert second.json()['translations']['fr']['answer'] == LONG_ANSWER
+        assert second['ETag'] == first['ETag']
+
+    def test_response_cache_compressor(self, faq, settings):
+        settings.CACHES = {
+            "default": dict(settings.CACHES["default"], OPTIONS={
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                "COMPRESSOR": "faqApp.compression.CacheCompressor",
+            })
+        }
+        client = APIClient()
+        url = reverse('faq-detail', args=[faq.id])
+        assert client.get(url, {'lang': 'fr'}).json()['answer'] == LONG_ANSWER
+        redis_client = get_redis_connection("default")
+        [key] = redis_client.keys('*detail_*_fr')
+        assert redis_client.get(key)[:1] == b'\x00'
+        assert client.get(url, {'lang': 'fr'}).json()['answer'] == LONG_ANSWER
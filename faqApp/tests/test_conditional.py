@@ -0,0 +1,45 @@
+import pytest
+from django.urls import reverse
+from faqApp.models import FAQ
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    @pytest.mark.parametrize('url_name', ['faq-list', 'faq-detail', 'faq-translations'])
+    def test_if_none_match_returns_304_without_queries(
+            self, api_client, faq, url_name, django_assert_num_queries):
+        kwargs = {} if url_name == 'faq-list' else {'pk': faq.id}
+        url = reverse(url_name, kwargs=kwargs) + '?lang=fr'
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response['ETag'].startswith('"')
+        assert 'Last-Modified' in response
+
+        with django_assert_num_queries(0):
+            repeat = api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert repeat.status_code == 304
+        assert repeat.content == b''
+
+    def test_if_modified_since_returns_304(self, api_client, faq):
+        url = reverse('faq-detail', kwargs={'pk': faq.id})
+        response = api_client.get(url)
+        repeat = api_client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert repeat.status_code == 304
+
+    def test_changed_faq_returns_full_response(self, api_client, faq):
+        url = reverse('faq-detail', kwargs={'pk': faq.id})
+        etag = api_client.get(url)['ETag']
+        api_client.patch(url, {'question_en': 'Changed?'}, format='json')
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert response.data['question'] == 'Changed?'
+
+    def test_deletion_changes_list_validators(self, api_client, faq):
+        other = FAQ.objects.create(question="Other?", answer="Other")
+        url = reverse('faq-list')
+        first = api_client.get(url)
+        api_client.delete(reverse('faq-detail', kwargs={'pk': other.id}))
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == 200
+        assert len(response.data['results']) == 1
@@ -0,0 +1,65 @@
+import pytest
+from django.urls import reverse
+from django_redis import get_redis_connection
+from faqApp.models import FAQ
+
+
+@pytest.mark.django_db
+class TestTargetedInvalidation:
+    @pytest.fixture
+    def redis_client(self):
+        return get_redis_connection("default")
+
+    @pytest.fixture
+    def faqs(self):
+        faqs = []
+        for i in range(4):
+            faq = FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+            faq.store_translations(
+                {'fr': {'question': f'Question {i} ?', 'answer': f'Réponse {i}'}})
+            faqs.append(faq)
+        return faqs
+
+    def warm(self, api_client, faqs):
+        next_url = f"{reverse('faq-list')}?page_size=2&lang=fr"
+        while next_url:
+            next_url = api_client.get(next_url).data['next']
+        for faq in faqs:
+            api_client.get(reverse('faq-detail', kwargs={'pk': faq.id}) + '?lang=fr')
+            api_client.get(reverse('faq-translations', kwargs={'pk': faq.id}))
+
+    def cached_keys(self, redis_client):
+        return {
+            key.decode() for key in redis_client.keys('*')
+            if b'generation' not in key and b'deps' not in key
+        }
+
+    def test_update_evicts_only_that_faqs_entries(self, api_client, faqs, redis_client):
+        self.warm(api_client, faqs)
+        faqs[0].get_translation('question', 'de')
+        before = self.cached_keys(redis_client)
+
+        url = reverse('faq-detail', kwargs={'pk': faqs[0].id})
+        response = api_client.patch(url, {'question_en': 'Changed?'}, format='json')
+        assert response.status_code == 200
+
+        evicted = before - self.cached_keys(redis_client)
+        assert evicted == {
+            key for key in before
+            if f'detail_{faqs[0].id}_' in key
+            or key == f'faq_translations_{faqs[0].id}'
+            or key == f'faq_{faqs[0].id}_question_de'
+            or key.endswith('list_fr_cfirst_s2')
+        }
+        assert len(evicted) == 4
+
+        response = api_client.get(f"{reverse('faq-list')}?page_size=2")
+        assert response.data['results'][0]['question'] == 'Changed?'
+
+    def test_create_and_delete_refresh_list_pages(self, api_client, faqs):
+        list_url = reverse('faq-list')
+        assert len(api_client.get(list_url).data['results']) == 4
+        api_client.delete(reverse('faq-detail', kwargs={'pk': faqs[1].id}))
+        assert len(api_client.get(list_url).data['results']) == 3
+        detail = api_client.get(reverse('faq-detail', kwargs={'pk': faqs[1].id}))
+        assert detail.status_code == 404
@@ -0,0 +1,75 @@
+import gc
+import threading
+import time
+import pytest
+from django.core.cache import cache
+from faqApp.cache import LocalCache, LocalInvalidationBus, TwoTierCache
+
+
+class TestLocalCache:
+    def test_evicts_least_recently_used(self):
+        local = LocalCache(max_entries=2, timeout=30)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        assert local.get('a') == (True, 1)
+        assert local.get('b') == (False, None)
+        assert len(local) == 2
+
+    def test_entries_expire(self):
+        local = LocalCache(timeout=0.01)
+        local.set('a', 1)
+        time.sleep(0.02)
+        assert local.get('a') == (False, None)
+
+
+@pytest.mark.django_db
+class TestTwoTierCache:
+    def make_worker(self):
+        return TwoTierCache(invalidation_bus='faqApp.cache.LocalInvalidationBus')
+
+    def test_reads_fill_the_local_tier(self):
+        worker_a, worker_b = self.make_worker(), self.make_worker()
+        worker_a.set('faq_key', {'id': 1})
+        assert worker_b.get('faq_key') == {'id': 1}
+        assert worker_b.get('faq_key') == {'id': 1}
+        assert worker_b.get('missing') is None
+        ratios = worker_b.hit_ratios()
+        assert ratios['local'] == {'hits': 1, 'misses': 2, 'hit_ratio': 0.3333,
+                                   'entries': 1, 'max_entries': 1024}
+        assert ratios['redis'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    def test_concurrent_lookups_are_all_counted(self):
+        worker = self.make_worker()
+        worker.local.set(cache.make_key('faq_key'), 'cached')
+
+        def look_up():
+            for _ in range(2000):
+                worker.get_local('faq_key')
+
+        threads = [threading.Thread(target=look_up) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert worker.hit_ratios()['local']['hits'] == 16000
+
+    def test_dropped_workers_stop_receiving_evictions(self):
+        worker = self.make_worker()
+        buses = len(LocalInvalidationBus._buses)
+        for _ in range(5):
+            self.make_worker()
+        gc.collect()
+        assert len(LocalInvalidationBus._buses) == buses
+        worker.local.set('faq_key', 'cached')
+        worker.evict(['faq_key'])
+        assert worker.local.get('faq_key') == (False, None)
+
+    def test_evictions_reach_other_workers(self):
+        worker_a, worker_b = self.make_worker(), self.make_worker()
+        worker_a.set('faq_key', 'old')
+        worker_b.get('faq_key')
+        cache.set('faq_key', 'new')
+        worker_a.evict([cache.make_key('faq_key')])
+        assert worker_b.get('faq_key') == 'new'
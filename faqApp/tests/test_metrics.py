@@ -0,0 +1,77 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from faqApp.metrics import Histogram
+from faqApp.models import FAQ
+
+
+def server_timing(response):
+    entries = (entry.split(';') for entry in response['Server-Timing'].split(', '))
+    return {name: dict(part.split('=', 1) for part in parts) for name, *parts in entries}
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', "Test.", (0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(('faq-list',), value)
+        assert histogram.expose() == [
+            '# HELP test_seconds Test.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{view="faq-list",le="0.1"} 1',
+            'test_seconds_bucket{view="faq-list",le="1"} 2',
+            'test_seconds_bucket{view="faq-list",le="+Inf"} 3',
+            'test_seconds_sum{view="faq-list"} 5.55',
+            'test_seconds_count{view="faq-list"} 3',
+        ]
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    @pytest.fixture(autouse=True)
+    def server_timing_on(self, settings):
+        settings.FAQ_SERVER_TIMING = True
+
+    def test_server_timing_counts_db_redis_and_cache(self):
+        FAQ.objects.create(question="Question?", answer="Answer")
+        client = APIClient()
+        miss = server_timing(client.get(reverse('faq-list')))
+        assert int(miss['db']['desc'].strip('"').split()[0]) > 0
+        assert int(miss['redis']['desc'].strip('"').split()[0]) > 0
+        assert 'local_miss=' in miss['cache']['desc']
+        hit = server_timing(client.get(reverse('faq-list')))
+        assert hit['db']['desc'] == '"0 calls"'
+        assert 'local_hit=' in hit['cache']['desc']
+
+    def test_translator_calls_of_async_views(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        response = async_to_sync(AsyncClient().get)(
+            reverse('faq-async-detail', args=[faq.id]), {'lang': 'hi'})
+        assert server_timing(response)['translator']['desc'] == '"1 calls"'
+
+    def test_metrics_endpoint(self, settings):
+        settings.FAQ_METRICS_TOKEN = 'scrape-secret'
+        APIClient().get(reverse('faq-list'))
+        response = APIClient().get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert '# TYPE faq_request_duration_seconds histogram' in body
+        assert 'faq_request_source_calls_count{view="faq-list",source="db"}' in body
+        assert 'faq_cache_lookups_total{tier="local",result="miss"}' in body
+
+    def test_metrics_endpoint_is_restricted(self, settings):
+        settings.FAQ_METRICS_TOKEN = 'scrape-secret'
+        client = APIClient()
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+        client.force_login(User.objects.create_user(username='editor', password='pw'))
+        assert client.get('/metrics').status_code == 403
+        client.force_login(User.objects.create_user(username='ops', password='pw', is_staff=True))
+        assert client.get('/metrics').status_code == 200
+
+    def test_header_is_optional(self, settings):
+        settings.FAQ_SERVER_TIMING = False
+        assert 'Server-Timing' not in APIClient().get(reverse('faq-list'))
@@ -1,5 +1,12 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 import pytest
-from faqApp.models import FAQ
+from django.db import DatabaseError
+from redis.exceptions import ConnectionError
+from faqApp.models import FAQ, FAQTranslation, TranslationMemory, source_hash
+from faqApp.tasks import get_translation_queue
+from faqApp.translation import get_translator
 
 @pytest.mark.django_db
 class TestFAQModel:
@@ -15,12 +22,145 @@ class TestFAQModel:
     def test_translations(self):
         faq = FAQ.objects.create(
             question="Test Question?",
-            answer="Test Answer",
-            translations={
-                'fr': {
-                    'question': 'Question de test?',
-                    'answer': 'Réponse de test'
-                }
-            }
+            answer="Test Answer"
         )
-        assert faq.translations['fr']['question'] == 'Question de test?' 
\ No newline at end of file
+        faq.store_translations({
+            'fr': {
+                'question': 'Question de test?',
+                'answer': 'Réponse de test'
+            }
+        })
+        assert faq.translation_map()['fr']['question'] == 'Question de test?'
+        assert faq.get_stored_translation('answer', 'fr') == 'Réponse de test'
+
+    def test_store_translation_upserts_one_row(self):
+        faq = FAQ.objects.create(question="Test Question?", answer="Test Answer")
+        faq.store_translation('question', 'fr', 'Première')
+        faq.store_translation('question', 'fr', 'Seconde')
+        faq.store_translation('question', 'hi', 'Hindi')
+        assert FAQTranslation.objects.filter(faq=faq).count() == 2
+        translation = FAQTranslation.objects.get(faq=faq, lang='fr', field='question')
+        assert translation.text == 'Seconde'
+        assert translation.source_hash == source_hash("Test Question?")
+
+    def test_with_translations_loads_one_language(self, django_assert_num_queries):
+        for i in range(3):
+            faq = FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+            faq.store_translations({'fr': {'question': f'Question {i} ?'},
+                                    'hi': {'question': f'Hindi {i}'}})
+        with django_assert_num_queries(2):
+            faqs = list(FAQ.with_translations(FAQ.objects.order_by('id'), ['fr']))
+            assert [faq.get_stored_translation('question', 'fr') for faq in faqs] == [
+                'Question 0 ?', 'Question 1 ?', 'Question 2 ?']
+            assert faqs[0].get_stored_translation('question', 'hi') is None
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTranslationSingleFlight:
+    def test_concurrent_misses_share_one_translator_call(self, settings):
+        settings.FAQ_TRANSLATOR = {
+            'BACKEND': 'faqApp.translation.StubTranslator',
+            'OPTIONS': {'latency': 0.2},
+        }
+        translator = get_translator()
+        calls_before = translator.calls
+        faq = FAQ.objects.create(question="Popular question?", answer="Answer")
+        barrier = threading.Barrier(50)
+
+        def read():
+            instance = FAQ.objects.get(pk=faq.pk)
+            barrier.wait()
+            return instance.get_translation('question', 'hi')
+
+        with ThreadPoolExecutor(max_workers=50) as pool:
+            results = list(pool.map(lambda _: read(), range(50)))
+
+        assert results == ['[hi] Popular question?'] * 50
+        assert translator.calls - calls_before == 1
+        assert faq.translation_map() == {'hi': {'question': '[hi] Popular question?'}}
+
+    def read_concurrently(self, faq, readers=20):
+        barrier = threading.Barrier(readers)
+
+        def read():
+            instance = FAQ.objects.get(pk=faq.pk)
+            barrier.wait()
+            return instance.get_translation('question', 'hi')
+
+        with ThreadPoolExecutor(max_workers=readers) as pool:
+            return list(pool.map(lambda _: read(), range(readers)))
+
+    def test_without_redis_leases_threads_still_translate_once(self):
+        translator = get_translator()
+        calls_before = translator.calls
+        faq = FAQ.objects.create(question="Popular question?", answer="Answer")
+
+        with mock.patch('faqApp.models.single_flight', side_effect=ConnectionError("down")):
+            results = self.read_concurrently(faq)
+
+        assert results == ['[hi] Popular question?'] * 20
+        assert translator.calls - calls_before == 1
+
+    def test_failed_store_neither_loses_nor_repeats_the_translation(self):
+        translator = get_translator()
+        calls_before = translator.calls
+        faq = FAQ.objects.create(question="Popular question?", answer="Answer")
+        upsert = FAQTranslation.upsert
+        failures = [DatabaseError("database table is locked")]
+
+        def flaky_upsert(rows):
+            if failures:
+                raise failures.pop()
+            return upsert(rows)
+
+        with mock.patch.object(FAQTranslation, 'upsert', side_effect=flaky_upsert):
+            results = self.read_concurrently(faq)
+
+        assert results == ['[hi] Popular question?'] * 20
+        assert translator.calls - calls_before == 1
+
+
+@pytest.mark.django_db
+class TestTranslationMemory:
+    def test_identical_texts_are_translated_once(self):
+        translator = get_translator()
+        first = FAQ.objects.create(question="How do I log in?", answer="First")
+        second = FAQ.objects.create(question="How do I log in?", answer="Second")
+        calls_before = translator.calls
+        assert first.get_translation('question', 'hi') == '[hi] How do I log in?'
+        assert second.get_translation('question', 'hi') == '[hi] How do I log in?'
+        assert translator.calls - calls_before == 1
+
+    def test_translate_sends_only_unseen_texts(self):
+        TranslationMemory.remember('fr', {'Known': 'Connu'})
+        translator = get_translator()
+        calls_before = translator.calls
+        assert TranslationMemory.translate(['Known', 'New', 'New'], 'fr') == [
+            'Connu', '[fr] New', '[fr] New']
+        assert translator.calls - calls_before == 1
+        assert TranslationMemory.translate(['New'], 'fr') == ['[fr] New']
+        assert translator.calls - calls_before == 1
+
+    def test_edit_retranslates_only_changed_fields(self):
+        faq = FAQ.objects.create(question="Question?", answer="Old answer")
+        for lang in ('hi', 'fr'):
+            faq.get_translation('question', lang)
+            faq.get_translation('answer', lang)
+
+        faq.answer = "New answer"
+        faq.save()
+        assert faq.translation_map() == {'fr': {'question': '[fr] Question?'},
+                                         'hi': {'question': '[hi] Question?'}}
+        assert faq.get_redis_translation('answer', 'hi') is None
+
+        get_translation_queue().drain()
+        assert faq.translation_map()['hi'] == {'question': '[hi] Question?',
+                                               'answer': '[hi] New answer'}
+
+    def test_save_without_changes_keeps_translations(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        faq.get_translation('question', 'hi')
+        faq.is_active = False
+        faq.save()
+        assert faq.retranslate_changed_fields() == []
+        assert faq.get_redis_translation('question', 'hi') == '[hi] Question?'
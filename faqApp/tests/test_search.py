@@ -0,0 +1,96 @@
+import pytest
+from importlib import import_module
+from io import StringIO
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.urls import reverse
+from faqApp.models import FAQ, SearchPosting
+from faqApp.search import tokenize
+
+
+class TestTokenize:
+    def test_keeps_indic_words_whole(self):
+        assert tokenize('भुगतान कैसे करें?') == ['भुगतान', 'कैसे', 'करें']
+
+    def test_folds_case(self):
+        assert tokenize('How do I PAY?') == ['how', 'do', 'i', 'pay']
+
+
+@pytest.mark.django_db
+class TestSearchIndex:
+    def test_question_matches_rank_first(self):
+        in_answer = FAQ.objects.create(question="How do I log in?",
+                                       answer="<p>Refunds are in settings</p>")
+        in_question = FAQ.objects.create(question="How do refunds work?",
+                                         answer="<p>Within a week</p>")
+        FAQ.objects.create(question="Unrelated?", answer="Nothing")
+        found = [faq_id for faq_id, _ in SearchPosting.search("refunds")]
+        assert found == [in_question.id, in_answer.id]
+
+    def test_edits_update_the_index(self):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        faq.question = "How do I subscribe?"
+        faq.save()
+        assert SearchPosting.search("pay") == []
+        assert SearchPosting.search("subscribe")[0][0] == faq.id
+
+    def test_translations_are_indexed_per_language(self):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        faq.store_translations({'hi': {'question': 'भुगतान कैसे करें?'}})
+        assert SearchPosting.search("भुगतान", lang='hi')[0][0] == faq.id
+        assert SearchPosting.search("भुगतान", lang='en') == []
+
+    def test_inactive_faqs_are_not_found(self):
+        FAQ.objects.create(question="How do I pay?", answer="By card", is_active=False)
+        assert SearchPosting.search("pay") == []
+
+    def test_document_count_is_cached_until_faqs_change(self, django_assert_num_queries):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        first = SearchPosting.search("pay")
+        # Only the term counts and the scoring, no COUNT of the FAQs
+        with django_assert_num_queries(2):
+            assert SearchPosting.search("pay") == first
+        FAQ.objects.create(question="Can I pay later?", answer="No")
+        faq.delete()
+        assert SearchPosting.document_count() == 1
+
+    def test_document_count_is_per_language(self):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        FAQ.objects.create(question="Can I pay later?", answer="No")
+        assert SearchPosting.document_count('hi') == 0
+        faq.store_translations({'hi': {'question': 'भुगतान कैसे करें?'}})
+        assert SearchPosting.document_count('hi') == 1
+        assert SearchPosting.document_count('en') == 2
+
+    def test_migration_indexes_existing_faqs(self):
+        index_existing_faqs = import_module(
+            'faqApp.migrations.0007_index_existing_faqs').index_existing_faqs
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        faq.store_translations({'fr': {'question': 'Comment payer ?'}})
+        SearchPosting.objects.all().delete()
+        index_existing_faqs(django_apps, None)
+        assert SearchPosting.search("card")[0][0] == faq.id
+        assert SearchPosting.search("payer", lang='fr')[0][0] == faq.id
+
+    def test_rebuild_command(self):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        SearchPosting.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert SearchPosting.search("card")[0][0] == faq.id
+
+
+@pytest.mark.django_db
+class TestSearchEndpoint:
+    def test_returns_ranked_translated_results(self, api_client):
+        faq = FAQ.objects.create(question="How do I pay?", answer="By card")
+        faq.store_translations({'fr': {'question': 'Comment payer ?', 'answer': 'Par carte'}})
+        response = api_client.get(reverse('faq-search'), {'q': 'carte', 'lang': 'fr'})
+        assert response.status_code == 200
+        assert response.data['count'] == 1
+        result = response.data['results'][0]
+        assert result['id'] == faq.id
+        assert result['answer'] == 'Par carte'
+        assert result['score'] > 0
+
+    def test_requires_a_query(self, api_client):
+        assert api_client.get(reverse('faq-search')).status_code == 400
@@ -0,0 +1,62 @@
+import pytest
+from faqApp.models import FAQ, TranslationMemory
+from faqApp.segments import join_html, split_html, translate_html
+from faqApp.tasks import get_translation_queue
+from faqApp.translation import get_translator
+
+ANSWER = (
+    '<p>Open <strong>Settings</strong> &amp; choose a plan.</p>\n'
+    '<ul><li>Monthly</li><li>Yearly</li></ul>'
+    '<pre>pip install faq</pre><img src="plan.png" alt="Plans"><p>&nbsp;</p>'
+)
+
+
+class TestSplitHtml:
+    def test_round_trip_keeps_markup(self):
+        parts, segments = split_html(ANSWER)
+        assert segments == ['Open <x1>Settings</x1> & choose a plan.', 'Monthly', 'Yearly']
+        assert join_html(parts, segments) == ANSWER.replace('&nbsp;', '\xa0')
+
+    def test_translates_text_only(self):
+        translated = translate_html(ANSWER, lambda segments: [s.upper() for s in segments])
+        assert translated.startswith('<p>OPEN <strong>SETTINGS</strong> &amp; CHOOSE A PLAN.</p>')
+        assert '<pre>pip install faq</pre><img src="plan.png" alt="Plans">' in translated
+
+    def test_plain_text_is_one_segment(self):
+        assert split_html('  How do I pay?\n')[1] == ['How do I pay?']
+
+    def test_inline_markup_stays_in_the_sentence(self):
+        markup = ('<p>See <a href="/plans">our <b>plans</b></a> or run <code>faq --help</code>.'
+                  '<br></p><li><a href="/faq">Monthly</a></li>')
+        parts, segments = split_html(markup)
+        assert segments == ['See <x1>our <x2>plans</x2></x1> or run <x3/>.', 'Monthly']
+        assert join_html(parts, segments) == markup
+        # Translators may reorder placeholders, and may drop them
+        reordered = join_html(parts, ['<x3/> <X2>Pläne</X2> <x1>unsere</x1>', 'Monatlich'])
+        assert reordered.startswith(
+            '<p><code>faq --help</code> <b>Pläne</b> <a href="/plans">unsere</a><br></p>')
+        dropped = join_html(parts, ['Siehe Pläne', 'Monatlich'])
+        assert dropped.startswith('<p>Siehe Pläne<code>faq --help</code><br></p>')
+
+
+@pytest.mark.django_db
+class TestSegmentedAnswerTranslation:
+    def test_answer_markup_survives_translation(self):
+        faq = FAQ.objects.create(question="Plans?", answer=ANSWER)
+        translated = faq.get_translation('answer', 'hi')
+        assert translated.startswith('<p>[hi] Open <strong>Settings</strong> &amp; choose a plan.')
+        assert '<li>[hi] Monthly</li>' in translated
+
+    def test_one_word_edit_retranslates_one_segment(self):
+        faq = FAQ.objects.create(question="Plans?", answer=ANSWER)
+        faq.get_translation('answer', 'fr')
+        segments_before = TranslationMemory.objects.filter(lang='fr').count()
+        calls_before = get_translator().calls
+
+        faq.answer = ANSWER.replace('Yearly', 'Weekly')
+        faq.save()
+        get_translation_queue().drain()
+
+        assert TranslationMemory.objects.filter(lang='fr').count() == segments_before + 1
+        assert get_translator().calls - calls_before == 1
+        assert '<li>[fr] Weekly</li>' in faq.get_stored_translation('answer', 'fr')
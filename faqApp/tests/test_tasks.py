@@ -0,0 +1,58 @@
+import threading
+import time
+from unittest import mock
+import pytest
+from faqApp.models import FAQ
+from faqApp.tasks import LocalTranslationQueue
+
+
+@pytest.mark.django_db
+class TestLocalTranslationQueue:
+    def test_enqueue_deduplicates_pending_tasks(self):
+        queue = LocalTranslationQueue(start_worker=False)
+        assert queue.enqueue(1, 'question', 'hi')
+        assert not queue.enqueue(1, 'question', 'hi')
+        assert queue.enqueue(1, 'answer', 'hi')
+
+    def test_drain_stores_translations(self):
+        faq = FAQ.objects.create(question="Question?", answer="Answer")
+        queue = LocalTranslationQueue(start_worker=False)
+        queue.enqueue(faq.id, 'answer', 'bn')
+        queue.drain()
+        assert faq.translation_map() == {'bn': {'answer': '[bn] Answer'}}
+        # Finished tasks can be queued again
+        assert queue.enqueue(faq.id, 'answer', 'bn')
+
+    def test_worker_keeps_running_after_clear(self):
+        done = []
+        ran = threading.Event()
+
+        def record(*task):
+            done.append(task)
+            ran.set()
+
+        queue = LocalTranslationQueue()
+        with mock.patch('faqApp.tasks.run_translation', record):
+            queue.enqueue(1, 'question', 'hi')
+            assert ran.wait(timeout=5)
+            ran.clear()
+            # Let the worker go back to waiting on the queue
+            time.sleep(0.1)
+            queue.clear()
+            queue.enqueue(2, 'question', 'hi')
+            assert ran.wait(timeout=5)
+        assert done == [(1, 'question', 'hi'), (2, 'question', 'hi')]
+
+    def test_clear_drops_queued_tasks(self):
+        queue = LocalTranslationQueue(start_worker=False)
+        queue.enqueue(1, 'question', 'hi')
+        queue.clear()
+        with mock.patch('faqApp.tasks.run_translation') as run:
+            queue.drain()
+        run.assert_not_called()
+        assert queue.enqueue(1, 'question', 'hi')
+
+    def test_drain_ignores_deleted_faqs(self):
+        queue = LocalTranslationQueue(start_worker=False)
+        queue.enqueue(12345, 'question', 'fr')
+        queue.drain()
@@ -1,32 +1,24 @@
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 import pytest
 from rest_framework.test import APIClient
 from django.urls import reverse
 from faqApp.models import FAQ
-from django.contrib.auth.models import User
 from django_redis import get_redis_connection
+from faqApp.tasks import get_translation_queue
+from faqApp.benchmarks.support import RedisCommandCounter
+from faqApp.pagination import FAQPagination
+from django.core.cache import cache
+from faqApp.cache import TwoTierCache, get_generation, get_response_cache, revalidate
+from faqApp import views
+from faqApp.views import FAQViewSet
 
 @pytest.mark.django_db
 class TestFAQViewSet:
-    @pytest.fixture
-    def api_client(self):
-        user = User.objects.create_user(username='testuser', password='testpass')
-        client = APIClient()
-        client.force_authenticate(user=user)
-        return client
-    
-    @pytest.fixture
-    def faq_instance(self):
-        return FAQ.objects.create(
-            question="Test Question?",
-            answer="Test Answer",
-            translations={
-                'fr': {
-                    'question': 'Question de test?',
-                    'answer': 'Réponse de test'
-                }
-            }
-        )
-    
     @pytest.fixture(autouse=True)
     def setup_redis(self):
         redis_client = get_redis_connection("default")
@@ -34,17 +26,17 @@ class TestFAQViewSet:
         yield redis_client
         redis_client.flushdb()  # Clear after each test
 
-    def test_list_faqs(self, api_client, faq_instance):
+    def test_list_faqs(self, api_client, faq):
         url = reverse('faq-list')
         response = api_client.get(url)
         assert response.status_code == 200
-        assert len(response.data) == 1
+        assert len(response.data['results']) == 1
         
-    def test_list_faqs_with_language(self, api_client, faq_instance):
+    def test_list_faqs_with_language(self, api_client, faq):
         url = reverse('faq-list')
         response = api_client.get(f"{url}?lang=fr")
         assert response.status_code == 200
-        assert response.data[0]['question'] == 'Question de test?'
+        assert response.data['results'][0]['question'] == 'Question de test?'
 
     def test_create_faq(self, api_client):
         url = reverse('faq-list')
@@ -56,13 +48,13 @@ class TestFAQViewSet:
         response = api_client.post(url, data, format='json')
         assert response.status_code == 201
 
-    def test_cache_working(self, api_client, faq_instance):
+    def test_cache_working(self, api_client, faq):
         url = reverse('faq-list')
         response1 = api_client.get(url)
         assert response1.status_code == 200
         
         # Delete from DB but should still get from cache
-        faq_instance.delete()
+        faq.delete()
         response2 = api_client.get(url)
         assert response2.status_code == 200
         assert response2.data == response1.data
@@ -74,33 +66,278 @@ class TestFAQViewSet:
         assert 'languages' in response.data
         assert len(response.data['languages']) > 0
 
-    def test_translations_endpoint(self, api_client, faq_instance):
-        url = reverse('faq-translations', kwargs={'pk': faq_instance.id})
+    def test_translations_endpoint(self, api_client, faq):
+        url = reverse('faq-translations', kwargs={'pk': faq.id})
         response = api_client.get(url)
         assert response.status_code == 200
         assert response.data['translations']['fr']['question'] == 'Question de test?'
 
-    def test_retrieve_with_language(self, api_client, faq_instance):
-        url = reverse('faq-detail', kwargs={'pk': faq_instance.id})
+    def test_retrieve_with_language(self, api_client, faq):
+        url = reverse('faq-detail', kwargs={'pk': faq.id})
         response = api_client.get(f"{url}?lang=fr")
         assert response.status_code == 200
         assert response.data['question'] == 'Question de test?'
 
     def test_create_invalidates_cache(self, api_client):
         url = reverse('faq-list')
+        assert api_client.get(url).data['results'] == []
+
         data = {
-            'question': 'New Question?',
-            'answer': 'New Answer',
-            'translations': {
-                'fr': {
-                    'question': 'Nouvelle Question?',
-                    'answer': 'Nouvelle Réponse'
-                }
-            }
+            'question_en': 'New Question?',
+            'answer_en': 'New Answer',
         }
-        response = api_client.post(url, data, format='json')
+        with RedisCommandCounter() as counter:
+            response = api_client.post(url, data, format='json')
         assert response.status_code == 201
+        assert 'KEYS' not in counter.commands and 'SCAN' not in counter.commands
 
-        # Verify cache was invalidated
-        redis_client = get_redis_connection("default")
-        assert len(redis_client.keys('faq_*')) == 0 
\ No newline at end of file
+        # The cached empty page belongs to the previous cache generation
+        assert len(api_client.get(url).data['results']) == 1
+
+    def test_missing_translation_served_in_english_while_pending(self, api_client):
+        faq = FAQ.objects.create(question="Plain Question?", answer="Plain Answer")
+        url = reverse('faq-detail', kwargs={'pk': faq.id})
+        response = api_client.get(f"{url}?lang=hi")
+        assert response.status_code == 200
+        assert response.data['question'] == 'Plain Question?'
+        assert response.data['translation_status'] == {'question': 'pending', 'answer': 'pending'}
+
+        get_translation_queue().drain()
+        response = api_client.get(f"{url}?lang=hi")
+        assert response.data['question'] == '[hi] Plain Question?'
+        assert response.data['translation_status'] == {'question': 'ready', 'answer': 'ready'}
+
+    def test_translations_refresh_once_the_queue_stores_them(
+            self, api_client, faq, django_capture_on_commit_callbacks):
+        url = reverse('faq-translations', args=[faq.id])
+        assert set(api_client.get(url).data['translations']) == {'en', 'fr'}
+        api_client.get(reverse('faq-detail', args=[faq.id]), {'lang': 'hi'})
+        with django_capture_on_commit_callbacks(execute=True):
+            get_translation_queue().drain()
+        translations = api_client.get(url).data['translations']
+        assert translations['hi']['question'] == '[hi] Test Question?'
+
+    def test_unsupported_language_is_rejected(self, api_client, faq):
+        detail = reverse('faq-detail', kwargs={'pk': faq.id})
+        for url, params in [(reverse('faq-list'), {'lang': 'zz'}),
+                            (detail, {'lang': 'fr,zz'}),
+                            (reverse('faq-search'), {'q': 'test', 'lang': 'zz'})]:
+            response = api_client.get(url, params)
+            assert response.status_code == 400
+            assert 'zz' in json.dumps(response.json())
+        assert get_translation_queue()._queue.empty()
+
+    def test_list_fetches_translations_with_one_redis_call(self, api_client):
+        for i in range(5):
+            faq = FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+            faq.store_translations(
+                {'fr': {'question': f'Question {i} ?', 'answer': f'Réponse {i}'}})
+        url = reverse('faq-list')
+        get_generation('list')
+        with RedisCommandCounter() as counter:
+            response = api_client.get(f"{url}?lang=fr")
+        assert response.status_code == 200
+        assert counter.commands['MGET'] == 1
+        # list cache GET, translations MGET, list cache SET and one pipeline recording
+        # the page's dependencies, plus taking the recompute lock, re-checking the
+        # cache under it and releasing it; the generation comes from the local tier
+        assert counter.round_trips == 7
+
+    def test_language_bundle_costs_one_translation_read(self, api_client):
+        for i in range(3):
+            faq = FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+            faq.store_translations({
+                'fr': {'question': f'Question {i} ?', 'answer': f'Réponse {i}'},
+                'hi': {'question': f'प्रश्न {i}?', 'answer': f'उत्तर {i}'},
+            })
+        get_generation('list')
+        with RedisCommandCounter() as counter:
+            response = api_client.get(reverse('faq-list'), {'lang': 'fr,hi,en'})
+        results = response.json()['results']
+        assert list(results) == ['fr', 'hi', 'en']
+        assert [item['question'] for item in results['hi']] == [f'प्रश्न {i}?' for i in range(3)]
+        french = api_client.get(reverse('faq-list'), {'lang': 'fr'}).json()['results']
+        assert results['fr'] == french
+        assert counter.commands['MGET'] == 1
+        assert counter.round_trips == 7
+
+    def test_detail_language_bundle(self, api_client, faq):
+        url = reverse('faq-detail', args=[faq.id])
+        data = api_client.get(url, {'lang': 'en,fr'}).json()
+        assert data['en']['question'] == faq.question
+        assert data['fr'] == api_client.get(url, {'lang': 'fr'}).json()
+        too_many = ','.join(f'l{i}' for i in range(11))
+        assert api_client.get(url, {'lang': too_many}).status_code == 400
+
+    def test_list_is_paginated_and_cached_per_page(self, api_client, setup_redis):
+        faqs = [FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+                for i in range(5)]
+        url = reverse('faq-list')
+        first = api_client.get(f"{url}?page_size=2")
+        response = api_client.get(first.data['next'])
+        assert response.status_code == 200
+        questions = [faq['question'] for faq in response.data['results']]
+        assert questions == ['Question 2?', 'Question 3?']
+
+        cached_pages = setup_redis.keys('*list_en_*')
+        assert {key.decode().split('list_en_')[1] for key in cached_pages} == {
+            'cfirst_s2', f'cf{faqs[1].id}_0_s2'}
+
+    def test_list_skips_inactive_faqs(self, api_client):
+        active = FAQ.objects.create(question="Active?", answer="Answer")
+        FAQ.objects.create(question="Inactive?", answer="Answer", is_active=False)
+        url = reverse('faq-list')
+        assert [faq['id'] for faq in api_client.get(url).data['results']] == [active.id]
+
+    def test_activating_refreshes_list_pages(self, api_client, faq):
+        other = FAQ.objects.create(question="Other?", answer="Answer", is_active=False)
+        url = reverse('faq-list')
+        assert len(api_client.get(url).data['results']) == 1
+        api_client.patch(reverse('faq-detail', kwargs={'pk': other.id}),
+                         {'is_active': True}, format='json')
+        assert len(api_client.get(url).data['results']) == 2
+
+    def test_list_page_size_is_capped(self, api_client, faq, setup_redis):
+        url = reverse('faq-list')
+        response = api_client.get(f"{url}?page_size=1000")
+        assert response.status_code == 200
+        cached_pages = setup_redis.keys('*list_en_*')
+        assert cached_pages[0].decode().endswith(f'_s{FAQPagination.max_page_size}')
+
+    def test_list_invalid_cursor(self, api_client, faq):
+        url = reverse('faq-list')
+        assert api_client.get(f"{url}?cursor=abc").status_code == 404
+
+    def test_rendered_responses_are_served_from_cache(self, api_client, settings):
+        settings.FAQ_CACHE_RENDERED_RESPONSES = True
+        FAQ.objects.create(question="Long question?", answer="<p>Answer</p>" * 200)
+        url = reverse('faq-list')
+        first = api_client.get(url)
+        second = api_client.get(url)
+        assert second.status_code == 200
+        assert second['Content-Type'] == 'application/json'
+        assert second.content == first.content
+        assert json.loads(second.content)['results'][0]['question'] == 'Long question?'
+
+        compressed = api_client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert compressed['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.content) == first.content
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRecomputeStampede:
+    def test_concurrent_misses_build_once(self):
+        for i in range(3):
+            FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+        builds = []
+        cache_payload = FAQViewSet.cache_payload
+
+        def slow_cache_payload(view, *args):
+            builds.append(args)
+            time.sleep(0.2)
+            return cache_payload(view, *args)
+
+        barrier = threading.Barrier(10)
+
+        def fetch():
+            barrier.wait()
+            return APIClient().get(reverse('faq-list')).json()
+
+        with mock.patch.object(FAQViewSet, 'cache_payload', slow_cache_payload), \
+                ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(lambda _: fetch(), range(10)))
+
+        assert len(builds) == 1
+        assert all(result == results[0] for result in results)
+        assert len(results[0]['results']) == 3
+
+    def test_waiters_get_a_pending_build_without_queuing_behind_it(self):
+        for i in range(3):
+            FAQ.objects.create(question=f"Question {i}?", answer=f"Answer {i}")
+        serialize_bundle = FAQViewSet.serialize_bundle
+        builds = []
+
+        def slow_serialize_bundle(view, *args, **kwargs):
+            builds.append(args)
+            time.sleep(0.3)
+            return serialize_bundle(view, *args, **kwargs)
+
+        barrier = threading.Barrier(12)
+
+        def fetch():
+            barrier.wait()
+            return APIClient().get(reverse('faq-list'), {'lang': 'hi'})
+
+        started = time.monotonic()
+        with mock.patch.object(FAQViewSet, 'serialize_bundle', slow_serialize_bundle), \
+                ThreadPoolExecutor(max_workers=12) as pool:
+            responses = list(pool.map(lambda _: fetch(), range(12)))
+        elapsed = time.monotonic() - started
+
+        # Rebuilding one after another would take 12 * 0.3s. Pending results are
+        # not cached, so a request only arriving once the build is done rebuilds.
+        assert elapsed < 1.5
+        assert len(builds) <= 2
+        assert all(response.json() == responses[0].json() for response in responses)
+        assert all(response.json()['results'][0]['translation_status']['question'] == 'pending'
+                   for response in responses)
+        assert not any('ETag' in response for response in responses)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestStaleWhileRevalidate:
+    @pytest.fixture
+    def refreshes(self, settings):
+        settings.FAQ_CACHE_SOFT_TTL = 0
+        threads = []
+
+        def tracked_revalidate(*args, **kwargs):
+            threads.append(revalidate(*args, **kwargs))
+            return threads[-1]
+
+        with mock.patch.object(views, 'revalidate', tracked_revalidate):
+            yield threads
+        for thread in threads:
+            if thread is not None:
+                thread.join(timeout=5)
+
+    def test_stale_entry_is_served_then_refreshed(self, refreshes):
+        faq = FAQ.objects.create(question="Old question?", answer="Answer")
+        url = reverse('faq-detail', args=[faq.id])
+        client = APIClient()
+        assert client.get(url).json()['question'] == "Old question?"
+        # A write that skips invalidation, so only the refresh can pick it up
+        FAQ.objects.filter(pk=faq.pk).update(question="New question?")
+
+        assert client.get(url).json()['question'] == "Old question?"
+        refreshes[0].join(timeout=5)
+        assert client.get(url).json()['question'] == "New question?"
+
+    def test_refresh_evicts_other_workers_local_copies(self, refreshes):
+        faq = FAQ.objects.create(question="Old question?", answer="Answer")
+        url = reverse('faq-detail', args=[faq.id])
+        client = APIClient()
+        client.get(url)
+        redis_key = cache.make_key(FAQViewSet().get_cache_key('detail', pk=faq.id))
+        stale = get_response_cache().local.get(redis_key)[1]
+        other_worker = TwoTierCache(invalidation_bus='faqApp.cache.LocalInvalidationBus')
+        other_worker.local.set(redis_key, stale)
+
+        client.get(url)
+        refreshes[0].join(timeout=5)
+        assert other_worker.local.get(redis_key) == (False, None)
+
+    def test_one_refresh_per_key_at_a_time(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def rebuild():
+            started.set()
+            release.wait(timeout=5)
+
+        thread = revalidate('faq_test_key', rebuild, lease=10)
+        started.wait(timeout=5)
+        assert revalidate('faq_test_key', rebuild, lease=10) is None
+        release.set()
+        thread.join(timeout=5)
+        assert revalidate('faq_test_key', lambda: None, lease=10) is not None
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+from googletrans import Translator
+
+DEFAULT_TRANSLATOR = {
+    'BACKEND': 'faqApp.translation.GoogleTranslator',
+    'OPTIONS': {},
+}
+
+_translators = {}
+_translators_lock = threading.Lock()
+
+
+class GoogleTranslator:
+    """Translate through googletrans, sending a whole batch in one call."""
+
+    def translate_batch(self, texts, dest):
+        if not texts:
+            return []
+        translator = Translator()
+        results = translator.translate(list(texts), dest=dest)
+        return [result.text for result in results]
+
+    async def atranslate_batch(self, texts, dest):
+        # googletrans blocks, so it runs in a thread off the event loop
+        return await asyncio.to_thread(self.translate_batch, texts, dest)
+
+
+class StubTranslator:
+    """Offline translator for tests and benchmarks.
+
+    Returns the source text tagged with the target language, after an optional
+    artificial latency per batch.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts, dest):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [f'[{dest}] {text}' for text in texts]
+
+    async def atranslate_batch(self, texts, dest):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [f'[{dest}] {text}' for text in texts]
+
+
+def get_translator(config=None):
+    """Return the shared translator instance configured by FAQ_TRANSLATOR."""
+    config = config or getattr(settings, 'FAQ_TRANSLATOR', DEFAULT_TRANSLATOR)
+    options = config.get('OPTIONS', {})
+    key = (config['BACKEND'], tuple(sorted(options.items())))
+    with _translators_lock:
+        if key not in _translators:
+            _translators[key] = import_string(config['BACKEND'])(**options)
+        return _translators[key]
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import FAQViewSet
+from . import async_views
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -9,5 +10,9 @@ router.register(r'faqs', FAQViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/faqs/', async_views.faq_list, name='faq-async-list'),
+    path('async/faqs/<int:pk>/', async_views.faq_detail, name='faq-async-detail'),
+    path('async/faqs/<int:pk>/translations/', async_views.faq_translations,
+         name='faq-async-translations'),
     path('api-auth/', include('rest_framework.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,52 +1,203 @@
 from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.response import Response
-from django.core.cache import cache
 from django.conf import settings
-from .models import FAQ
+from .models import FAQ, FAQChange, SearchPosting
 from .serializers import FAQSerializer
+from .pagination import FAQPagination
+from .responses import CachedResponse, make_etag, not_modified, set_validators
+from .compression import compress, decompress
+from .locks import single_flight
+from .metrics import timed
+from .cache import (generation_timestamp, get_generation, get_response_cache, invalidate,
+                    log_redis_error, revalidate, track_dependencies)
+from .circuit import REDIS_ERRORS
 import json
+import time
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from googletrans import LANGUAGES
 from django_redis import get_redis_connection
+from datetime import datetime, timezone
+from django.utils.http import base36_to_int, int_to_base36
 import logging
 
 # Create your views here.
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RECOMPUTE_LOCK = {'LEASE': 10, 'WAIT': 2}
+MAX_BUNDLE_LANGUAGES = 10
+
+
+def requested_languages(query_params):
+    """Parse `?lang=hi`, or a bundle such as `?lang=hi,bn,fr`, into language codes.
+
+    Codes the translator does not know would stay pending for good, so they are rejected.
+    """
+    langs = list(dict.fromkeys(
+        code.strip() for code in query_params.get('lang', 'en').split(',') if code.strip()
+    ))
+    if len(langs) > MAX_BUNDLE_LANGUAGES:
+        raise ValidationError({'lang': f"At most {MAX_BUNDLE_LANGUAGES} languages per request"})
+    unsupported = [lang for lang in langs if not is_supported_language(lang)]
+    if unsupported:
+        raise ValidationError({'lang': f"Unsupported language: {', '.join(unsupported)}"})
+    return langs or ['en']
+
+
+def is_supported_language(lang):
+    return lang == 'en' or lang in LANGUAGES
+
+
+def since_token(position, as_of):
+    """Encode a change feed position and the time it was current as of."""
+    return f"{int_to_base36(position)}.{int_to_base36(int(as_of.timestamp()))}"
+
+
+def parse_since_token(token):
+    """Return the (position, as_of) of a since_token(), or (0, None) without one.
+
+    Raises ValueError for a malformed token.
+    """
+    if not token:
+        return 0, None
+    position, _, stamp = token.partition('.')
+    try:
+        as_of = datetime.fromtimestamp(base36_to_int(stamp), timezone.utc) if stamp else None
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"Timestamp out of range: {stamp}") from e
+    return base36_to_int(position), as_of
+
+
 class FAQViewSet(viewsets.ModelViewSet):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
-    redis_client = get_redis_connection("default")
+    pagination_class = FAQPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @property
+    def redis_client(self):
+        # Looked up per use, so it follows the CACHES setting in effect
+        return get_redis_connection("default")
+
     def get_queryset(self):
-        lang = self.request.query_params.get('lang', 'en')
-        queryset = FAQ.objects.all()
-        
-        if lang != 'en':
-            for faq in queryset:
-                cache_key = f'faq_{faq.id}_question_{lang}'
-                cached_question = self.redis_client.get(cache_key)
-                if not cached_question:
-                    translated = faq.get_translation('question', lang)
-                    self.redis_client.set(cache_key, translated, ex=3600)
-        
+        # Missing translations are queued by the serializer instead of being
+        # translated here, so reads never wait on the translator.
+        queryset = FAQ.objects.order_by('id')
+        langs = [lang for lang in requested_languages(self.request.query_params) if lang != 'en']
+        if langs:
+            queryset = FAQ.with_translations(queryset, langs)
         return queryset
 
+    @classmethod
+    def is_complete(cls, data):
+        """Whether serialized data has no translations still pending."""
+        if isinstance(data, dict) and 'results' in data:
+            data = data['results']
+        # Language bundles map each language to what one language would return
+        if isinstance(data, dict) and 'translation_status' not in data:
+            return all(cls.is_complete(part) for part in data.values())
+        items = data if isinstance(data, list) else [data]
+        return all(
+            'pending' not in item.get('translation_status', {}).values()
+            for item in items
+        )
+
     def get_cache_key(self, key_type, **kwargs):
+        # Keys embed their family's generation, so all of them can be dropped with one Redis call
+        if key_type in ('list', 'detail'):
+            generation = kwargs.get('generation') or get_generation(key_type)
+            prefix = f"{settings.CACHE_KEY_PREFIX}g{generation}_"
         if key_type == 'list':
-            return f"{settings.CACHE_KEY_PREFIX}list_{kwargs.get('lang', 'en')}"
+            return f"{prefix}list_{kwargs.get('lang', 'en')}_{kwargs['page']}"
         elif key_type == 'detail':
-            return f"{settings.CACHE_KEY_PREFIX}detail_{kwargs['pk']}_{kwargs.get('lang', 'en')}"
+            return f"{prefix}detail_{kwargs['pk']}_{kwargs.get('lang', 'en')}"
         return None
 
-    def invalidate_cache(self):
-        keys = cache.keys(f"{settings.CACHE_KEY_PREFIX}*")
-        if keys:
-            cache.delete_many(keys)
+    def cache_payload(self, data, faqs, generation):
+        """Wrap serialized data for caching, with its ETag and Last-Modified.
+
+        Content changes either through an FAQ's updated_at or through a
+        generation bump (e.g. a deletion shifting a page), so Last-Modified is
+        the later of the two.
+        """
+        last_modified = max(
+            [faq.updated_at.timestamp() for faq in faqs] + [generation_timestamp(generation)]
+        )
+        soft_ttl = getattr(settings, 'FAQ_CACHE_SOFT_TTL', None)
+        return CachedResponse(
+            data,
+            last_modified=last_modified,
+            render=getattr(settings, 'FAQ_CACHE_RENDERED_RESPONSES', False),
+            compress=getattr(settings, 'FAQ_CACHE_COMPRESSED_RESPONSES', True),
+            fresh_until=time.time() + soft_ttl if soft_ttl is not None else None,
+        )
+
+    def cached_or_build(self, request, cache_key, generation, build):
+        """Answer from the response cache, or from `build()` -> (data, faqs).
+
+        Concurrent misses of one key rebuild it once: the worker holding the
+        recompute lock runs `build`, the others wait up to
+        FAQ_RECOMPUTE_LOCK['WAIT'] seconds for its result before building it
+        themselves. Results with translations still pending are published for
+        that long under a key only the waiters read, so they are not rebuilt
+        once per waiter, yet never served with validators or after the
+        translation is done.
+
+        Entries past FAQ_CACHE_SOFT_TTL are served as they are while one
+        worker rebuilds them in the background, until CACHE_TTL drops them.
+        """
+        response_cache = get_response_cache()
+        lock = getattr(settings, 'FAQ_RECOMPUTE_LOCK', DEFAULT_RECOMPUTE_LOCK)
+        partial_key = f'{cache_key}_partial'
+        built = []
+
+        def compute():
+            data, faqs = build()
+            built.append(data)
+            if not cache_key:
+                return None
+            # Responses still serving English fallbacks must not outlive the translation
+            if not self.is_complete(data):
+                response_cache.set(partial_key, data, timeout=lock['WAIT'])
+                return data
+            payload = self.cache_payload(data, faqs, generation)
+            response_cache.set(cache_key, payload, timeout=settings.CACHE_TTL)
+            track_dependencies(cache_key, [faq.id for faq in faqs])
+            return payload
+
+        payload = None
+        if cache_key:
+            try:
+                payload = single_flight(
+                    self.redis_client, cache_key,
+                    fetch=lambda: response_cache.get(cache_key),
+                    wait_fetch=lambda: (response_cache.get(cache_key)
+                                        or response_cache.get(partial_key)),
+                    compute=compute,
+                    lease=lock['LEASE'],
+                    wait=lock['WAIT'],
+                )
+            except REDIS_ERRORS as e:
+                # Without Redis every worker rebuilds for itself into its local tier
+                log_redis_error("Taking the recompute lock", e)
+        if payload is None and not built:
+            payload = compute()
+        if payload is None:
+            return Response(built[-1])
+        if not built and isinstance(payload, CachedResponse) and payload.is_stale():
+            revalidate(cache_key, compute, lease=lock['LEASE'])
+        return self.cached_response(request, payload)
+
+    def cached_response(self, request, payload):
+        if isinstance(payload, CachedResponse):
+            return payload.to_response(request)
+        return Response(payload)
+
+    def invalidate_cache(self, faq_id=None, list_changed=True):
+        invalidate(faq_id, list_changed=list_changed)
 
     @action(detail=False, methods=['get'])
     def available_languages(self, request):
@@ -58,15 +209,101 @@ class FAQViewSet(viewsets.ModelViewSet):
             ]
         })
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search over FAQs in the requested language"""
+        query = request.query_params.get('q', '').strip()
+        lang = request.query_params.get('lang', 'en')
+        if not query:
+            return Response({'error': "The 'q' parameter is required"}, status=400)
+        if not is_supported_language(lang):
+            return Response({'error': f"Unsupported language: {lang}"}, status=400)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({'error': "'limit' must be an integer"}, status=400)
+
+        matches = SearchPosting.search(query, lang=lang, limit=max(limit, 1))
+        scores = dict(matches)
+        queryset = FAQ.objects.filter(id__in=scores)
+        if lang != 'en':
+            queryset = FAQ.with_translations(queryset, [lang])
+        faqs = sorted(queryset, key=lambda faq: (-scores[faq.id], faq.id))
+        serializer = self.serializer_class(
+            faqs,
+            many=True,
+            context={
+                'language': lang,
+                'prefetched_translations': FAQ.prefetch_cached_translations(faqs, lang),
+            }
+        )
+        results = [dict(item, score=round(scores[item['id']], 4)) for item in serializer.data]
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """FAQs created, updated or deleted since a `since` token, for delta sync
+
+        Deleted and deactivated FAQs come back as ids in `deleted`. Pass the
+        returned `since` on the next call; omit it to fetch everything. With
+        `resync` set the token had expired: the feed restarted from scratch,
+        and the client should replace its copy instead of applying changes.
+        """
+        lang = request.query_params.get('lang', 'en')
+        if not is_supported_language(lang):
+            return Response({'error': f"Unsupported language: {lang}"}, status=400)
+        try:
+            position, as_of = parse_since_token(request.query_params.get('since'))
+            limit = min(int(request.query_params.get('limit', 500)), 1000)
+        except ValueError:
+            return Response({'error': "Invalid 'since' token or 'limit'"}, status=400)
+
+        changed, position, as_of, has_more, resync = FAQChange.since(
+            position, lang, limit=max(limit, 1), as_of=as_of)
+        queryset = FAQ.objects.filter(
+            id__in=[faq_id for faq_id, deleted in changed.items() if not deleted],
+            is_active=True,
+        ).order_by('id')
+        if lang != 'en':
+            queryset = FAQ.with_translations(queryset, [lang])
+        faqs = list(queryset)
+        serializer = self.serializer_class(
+            faqs,
+            many=True,
+            context={
+                'language': lang,
+                'prefetched_translations': FAQ.prefetch_cached_translations(faqs, lang),
+            }
+        )
+        found = {faq.id for faq in faqs}
+        return Response({
+            'changes': serializer.data,
+            'deleted': sorted(faq_id for faq_id in changed if faq_id not in found),
+            'since': since_token(position, as_of),
+            'has_more': has_more,
+            'resync': resync,
+        })
+
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Hit ratios of the local and Redis cache tiers in this worker process"""
+        return Response(get_response_cache().hit_ratios())
+
     @action(detail=True, methods=['get'])
     def translations(self, request, pk=None):
         """Get all translations for a specific FAQ"""
-        instance = self.get_object()
-        cache_key = f'faq_translations_{instance.id}'
-        
-        cached_data = self.redis_client.get(cache_key)
+        # Cache hits and conditional requests are answered without loading the FAQ
+        cache_key = f'faq_translations_{pk}'
+
+        try:
+            cached_data = self.redis_client.get(cache_key)
+        except REDIS_ERRORS as e:
+            log_redis_error("Reading cached translations", e)
+            cached_data = None
         if cached_data:
-            return Response(json.loads(cached_data))
+            return self.translations_response(request, decompress(cached_data))
+
+        instance = self.get_object()
 
         data = {
             'id': instance.id,
@@ -78,66 +315,99 @@ class FAQViewSet(viewsets.ModelViewSet):
             }
         }
         
-        # Add translations from JSONField
-        if instance.translations:
-            data['translations'].update(instance.translations)
+        # Add the stored translations
+        data['translations'].update(instance.translation_map())
         
-        self.redis_client.set(cache_key, json.dumps(data), ex=3600)
-        return Response(data)
+        payload = json.dumps({'last_modified': instance.updated_at.timestamp(), 'data': data})
+        try:
+            self.redis_client.set(cache_key, compress(payload), ex=3600)
+        except REDIS_ERRORS as e:
+            log_redis_error("Caching translations", e)
+        else:
+            track_dependencies(cache_key, [instance.id], raw=True)
+        return self.translations_response(request, payload.encode())
+
+    def translations_response(self, request, payload):
+        cached = json.loads(payload)
+        etag, last_modified = make_etag(payload), int(cached['last_modified'])
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(cached['data'])
+        return set_validators(response, etag, last_modified)
+
+    def serialize_bundle(self, faqs, langs, many=True):
+        """Serialize in each of `langs`, reading their cached translations in one MGET.
+
+        Returns what a single language would, or {lang: that} for several.
+        """
+        prefetched = FAQ.prefetch_cached_bundle(faqs, langs)
+        with timed('serialize'):
+            bundle = {
+                lang: self.serializer_class(
+                    faqs if many else faqs[0],
+                    many=many,
+                    context={
+                        'language': lang,
+                        'prefetched_translations': prefetched[lang],
+                    }
+                ).data
+                for lang in langs
+            }
+        return bundle[langs[0]] if len(langs) == 1 else bundle
 
     def list(self, request, *args, **kwargs):
-        lang = request.query_params.get('lang', 'en')
-        cache_key = self.get_cache_key('list', lang=lang)
-        
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-        
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(
-            queryset, 
-            many=True,
-            context={'language': lang}
-        )
-        data = serializer.data
-        
-        cache.set(cache_key, data, timeout=settings.CACHE_TTL)
-        return Response(data)
+        """List active FAQs, in one language or in a bundle such as ?lang=hi,bn,fr"""
+        langs = requested_languages(request.query_params)
+        # Each page is cached on its own, so cost follows the page size, not the table size
+        page_token = self.paginator.get_cache_token(request)
+        generation = get_generation('list')
+        cache_key = page_token and self.get_cache_key(
+            'list', lang=','.join(langs), page=page_token, generation=generation)
+
+        def build():
+            faqs = list(self.paginate_queryset(self.get_queryset().filter(is_active=True)))
+            return self.get_paginated_response(self.serialize_bundle(faqs, langs)).data, faqs
+
+        return self.cached_or_build(request, cache_key, generation, build)
 
     def retrieve(self, request, *args, **kwargs):
-        """Get single FAQ with optional language parameter"""
-        lang = request.query_params.get('lang', 'en')
-        instance = self.get_object()
-        cache_key = self.get_cache_key('detail', pk=instance.id, lang=lang)
+        """Get single FAQ with optional language parameter, or a bundle such as ?lang=hi,bn"""
+        langs = requested_languages(request.query_params)
+        # Cache hits and conditional requests are answered without loading the FAQ
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        generation = get_generation('detail')
+        cache_key = self.get_cache_key('detail', pk=pk, lang=','.join(langs),
+                                       generation=generation)
 
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
+        def build():
+            instance = self.get_object()
+            return self.serialize_bundle([instance], langs, many=False), [instance]
 
-        serializer = self.serializer_class(
-            instance,
-            context={'language': lang}
-        )
-        data = serializer.data
-        cache.set(cache_key, data, timeout=settings.CACHE_TTL)
-        return Response(data)
+        return self.cached_or_build(request, cache_key, generation, build)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        self.invalidate_cache()
+        self.invalidate_cache(serializer.instance.id)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=201, headers=headers)
 
+    def perform_update(self, serializer):
+        was_active = serializer.instance.is_active
+        super().perform_update(serializer)
+        self.activity_changed = serializer.instance.is_active != was_active
+
     def update(self, request, *args, **kwargs):
         response = super().update(request, *args, **kwargs)
-        self.invalidate_cache()
+        # Pages hold active FAQs ordered by id, so an update only changes pages
+        # other than the FAQ's own when it is (de)activated
+        self.invalidate_cache(kwargs['pk'], list_changed=self.activity_changed)
         return response
 
     def destroy(self, request, *args, **kwargs):
         response = super().destroy(request, *args, **kwargs)
-        self.invalidate_cache()
+        self.invalidate_cache(kwargs['pk'])
         return response
 
     @action(detail=False, methods=['get'])